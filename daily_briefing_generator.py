@@ -1,10 +1,14 @@
 import streamlit as st
+import io
 import os
-import json
+import traceback
 import pandas as pd
 from datetime import datetime
-from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from google_clients import get_credentials, execute_with_retry, SPREADSHEETS_READONLY_SCOPE
+
+# 다운로드 파일명에 붙는 생성 시각 형식
+FILE_TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
 
 def get_time_window_text(selection: str) -> str:
     """UI 선택에 따라 시간 범위 텍스트를 반환합니다."""
@@ -27,24 +31,11 @@ class DailyBriefingGenerator:
     def _authenticate_google(self):
         """구글 API 인증"""
         try:
-            # 환경변수에서 서비스 계정 JSON 읽기 시도
-            service_account_json_str = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
-            if service_account_json_str:
-                service_account_info = json.loads(service_account_json_str)
-                credentials = service_account.Credentials.from_service_account_info(
-                    service_account_info,
-                    scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (환경변수에서 JSON)")
-            else:
-                # 파일에서 JSON 읽기 시도
-                credentials = service_account.Credentials.from_service_account_file(
-                    'service-account-key.json',
-                    scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (파일에서 JSON)")
+            # 서비스 계정 JSON은 프로세스당 한 번만 파싱 (google_clients 캐시 재사용)
+            credentials = get_credentials((SPREADSHEETS_READONLY_SCOPE,))
             
-            self.service = build('sheets', 'v4', credentials=credentials)
+            # 패키지에 포함된 디스커버리 문서 사용 (HTTP 다운로드와 파일 캐시 생략)
+            self.service = build('sheets', 'v4', credentials=credentials, cache_discovery=False, static_discovery=True)
         except Exception as e:
             print(f"❌ 구글 API 인증 실패: {e}")
             raise
@@ -53,32 +44,76 @@ class DailyBriefingGenerator:
     def get_sheet_data(self, sheet_name: str) -> pd.DataFrame:
         """구글 시트에서 데이터를 DataFrame으로 읽기"""
         try:
-            result = self.service.spreadsheets().values().get(
+            result = execute_with_retry(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=sheet_name
-            ).execute()
+                range=sheet_name,
+                fields='values'
+            ))
             
-            values = result.get('values', [])
-            if not values:
-                return pd.DataFrame()
-            
-            # 첫 번째 행을 헤더로 사용
-            df = pd.DataFrame(values[1:], columns=values[0])
-            return df
+            return self._values_to_df(result.get('values', []))
             
         except Exception as e:
             print(f"❌ '{sheet_name}' 시트 읽기 실패: {e}")
             return pd.DataFrame()
     
+    def get_sheets_data(self, sheet_names: list) -> dict:
+        """
+        여러 시트를 values.batchGet 한 번으로 읽어 {시트명: DataFrame} 반환
+        
+        일부 시트가 없어 batchGet이 실패하면 시트별로 따로 읽습니다.
+        """
+        try:
+            result = execute_with_retry(self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=list(sheet_names),
+                fields='valueRanges(values)'
+            ))
+            value_ranges = result.get('valueRanges', [])
+            return {
+                sheet_name: self._values_to_df(value_range.get('values', []))
+                for sheet_name, value_range in zip(sheet_names, value_ranges)
+            }
+        except Exception as e:
+            print(f"⚠️ 시트 일괄 읽기 실패, 시트별로 다시 읽습니다: {e}")
+            return {sheet_name: self.get_sheet_data(sheet_name) for sheet_name in sheet_names}
+    
+    @staticmethod
+    def _values_to_df(values: list) -> pd.DataFrame:
+        """시트 값 목록을 DataFrame으로 변환 (첫 번째 행을 헤더로 사용)"""
+        if not values:
+            return pd.DataFrame()
+        return pd.DataFrame(values[1:], columns=values[0])
+    
     def get_data_as_csv(self, sheet_name: str) -> str:
         """구글 시트 데이터를 CSV 문자열로 변환"""
+        return self._df_to_csv(self.get_sheet_data(sheet_name), sheet_name)
+    
+    def get_data_as_csv_bytes(self, sheet_name: str) -> bytes:
+        """구글 시트 데이터를 다운로드용 CSV bytes로 변환 (중간 문자열 없이 바로 인코딩)"""
         try:
             df = self.get_sheet_data(sheet_name)
             if df.empty:
-                return ""
+                return b""
             
             # UTF-8 BOM 인코딩으로 Excel 호환성 확보
-            csv_string = df.to_csv(index=False, encoding='utf-8-sig')
+            buffer = io.BytesIO()
+            df.to_csv(buffer, index=False, encoding='utf-8-sig')
+            csv_bytes = buffer.getvalue()
+            print(f"✅ '{sheet_name}' CSV 변환 완료: {len(csv_bytes)}바이트")
+            return csv_bytes
+            
+        except Exception as e:
+            print(f"❌ '{sheet_name}' CSV 변환 실패: {e}")
+            return b""
+    
+    @staticmethod
+    def _df_to_csv(df: pd.DataFrame, sheet_name: str) -> str:
+        """이미 읽어온 시트 DataFrame을 CSV 문자열로 변환 (시트를 다시 읽지 않음)"""
+        try:
+            if df.empty:
+                return ""
+            
+            csv_string = df.to_csv(index=False)
             print(f"✅ '{sheet_name}' CSV 변환 완료: {len(csv_string)}자")
             return csv_string
             
@@ -86,6 +121,11 @@ class DailyBriefingGenerator:
             print(f"❌ '{sheet_name}' CSV 변환 실패: {e}")
             return ""
     
+    @staticmethod
+    def _csv_to_bytes(csv_string: str) -> bytes:
+        """다운로드용 CSV bytes (UTF-8 BOM 인코딩으로 Excel 호환성 확보)"""
+        return csv_string.encode('utf-8-sig') if csv_string else b""
+    
     
     def generate_complete_prompt(self, time_window_text: str = "지난 24시간 동안") -> str:
         """완성된 프롬프트 생성"""
@@ -172,9 +212,9 @@ class DailyBriefingGenerator:
     def get_available_sheets(self) -> list:
         """사용 가능한 시트 목록 조회"""
         try:
-            spreadsheet = self.service.spreadsheets().get(
+            spreadsheet = execute_with_retry(self.service.spreadsheets().get(
                 spreadsheetId=self.spreadsheet_id
-            ).execute()
+            ))
             
             sheets = spreadsheet.get('sheets', [])
             sheet_names = [sheet['properties']['title'] for sheet in sheets]
@@ -190,18 +230,16 @@ class DailyBriefingGenerator:
         try:
             print("🚀 완전한 패키지 생성 시작...")
             
-            # 1. 포트폴리오 데이터 읽기
-            print("📊 포트폴리오 데이터 읽기...")
-            portfolio_df = self.get_sheet_data("Portfolio")
-            
-            # 2. 투자 노트 데이터 읽기
-            print("📝 투자 노트 데이터 읽기...")
-            notes_df = self.get_sheet_data("투자_노트")
+            # 1~2. 포트폴리오와 투자 노트 데이터를 한 번의 요청으로 읽기
+            print("📊 포트폴리오 / 📝 투자 노트 데이터 읽기...")
+            sheets = self.get_sheets_data(["Portfolio", "투자_노트"])
+            portfolio_df = sheets["Portfolio"]
+            notes_df = sheets["투자_노트"]
             
-            # 3. CSV 파일 생성
+            # 3. CSV 파일 생성 (위에서 읽은 데이터를 재사용하고, 다운로드용 bytes도 한 번만 인코딩)
             print("📁 CSV 파일 생성...")
-            portfolio_csv = self.get_data_as_csv("Portfolio")
-            notes_csv = self.get_data_as_csv("투자_노트")
+            portfolio_csv = self._df_to_csv(portfolio_df, "Portfolio")
+            notes_csv = self._df_to_csv(notes_df, "투자_노트")
             
             # 4. 완성된 프롬프트 생성
             print("🤖 완성된 프롬프트 생성...")
@@ -211,6 +249,8 @@ class DailyBriefingGenerator:
             package = {
                 'portfolio_csv': portfolio_csv,
                 'notes_csv': notes_csv,
+                'portfolio_csv_bytes': self._csv_to_bytes(portfolio_csv),
+                'notes_csv_bytes': self._csv_to_bytes(notes_csv),
                 'complete_prompt': complete_prompt,
                 'portfolio_df': portfolio_df,
                 'notes_df': notes_df,
@@ -226,12 +266,38 @@ class DailyBriefingGenerator:
                 'error': str(e),
                 'portfolio_csv': None,
                 'notes_csv': None,
+                'portfolio_csv_bytes': None,
+                'notes_csv_bytes': None,
                 'complete_prompt': None,
                 'portfolio_df': None,
                 'notes_df': None,
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
+@st.cache_data(ttl=300, show_spinner=False)
+def get_secret(key):
+    """Streamlit secrets 또는 환경변수에서 값 가져오기 (5분 동안 캐시하여 secrets 변경도 재시작 없이 반영)"""
+    try:
+        if hasattr(st, 'secrets') and st.secrets:
+            return st.secrets.get(key)
+    except:
+        pass
+    return os.getenv(key)
+
+@st.cache_resource(show_spinner="데일리 브리핑 생성기 초기화 중...")
+def bootstrap(spreadsheet_id: str) -> DailyBriefingGenerator:
+    """UI와 무관한 초기화 (생성기 인증)를 한 번만 수행"""
+    return DailyBriefingGenerator(spreadsheet_id)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_sheet_names(_generator: DailyBriefingGenerator, spreadsheet_id: str) -> list:
+    """시트 목록 조회 (5분 동안 캐시하여 새로 추가된 시트도 재시작 없이 반영)"""
+    available_sheets = _generator.get_available_sheets()
+    if not available_sheets:
+        # 빈 목록이 캐시되지 않도록 예외로 처리 (다음 rerun에서 다시 시도)
+        raise RuntimeError("사용 가능한 시트가 없습니다.")
+    return available_sheets
+
 def main():
     """메인 함수"""
     st.set_page_config(
@@ -243,16 +309,6 @@ def main():
     st.title("📊 데일리 브리핑 생성기")
     st.markdown("매크로 이슈 분석 + 포트폴리오 데이터 + 완성된 프롬프트 생성")
     
-    # 환경변수 설정
-    def get_secret(key):
-        """Streamlit secrets 또는 환경변수에서 값 가져오기"""
-        try:
-            if hasattr(st, 'secrets') and st.secrets:
-                return st.secrets.get(key)
-        except:
-            pass
-        return os.getenv(key)
-    
     spreadsheet_id = get_secret('GOOGLE_SPREADSHEET_ID')
     
     if not spreadsheet_id:
@@ -261,13 +317,8 @@ def main():
     
     # 데일리 브리핑 생성기 초기화
     try:
-        generator = DailyBriefingGenerator(spreadsheet_id)
-        available_sheets = generator.get_available_sheets()
-        
-        if not available_sheets:
-            st.error("❌ 사용 가능한 시트가 없습니다.")
-            return
-            
+        generator = bootstrap(spreadsheet_id)
+        available_sheets = get_sheet_names(generator, spreadsheet_id)
     except Exception as e:
         st.error(f"❌ 데일리 브리핑 생성기 초기화 실패: {e}")
         return
@@ -355,7 +406,7 @@ def main():
                         st.download_button(
                             label="📥 포트폴리오 CSV 다운로드",
                             data=package['portfolio_csv'],
-                            file_name=f"portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            file_name=f"portfolio_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.csv",
                             mime="text/csv",
                             key="download_portfolio_csv"
                         )
@@ -371,7 +422,7 @@ def main():
                         st.download_button(
                             label="📥 투자노트 CSV 다운로드",
                             data=package['notes_csv'],
-                            file_name=f"investment_notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            file_name=f"investment_notes_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.csv",
                             mime="text/csv",
                             key="download_notes_csv"
                         )
@@ -412,7 +463,6 @@ def main():
                     
         except Exception as e:
             st.error(f"❌ 완전한 패키지 생성 실패: {e}")
-            import traceback
             st.error(f"상세 오류: {traceback.format_exc()}")
     # 세션 상태에 저장된 패키지가 있으면 표시
     if 'generated_package' in st.session_state:
@@ -463,7 +513,7 @@ def main():
                 st.download_button(
                     label="📥 포트폴리오 CSV 다운로드",
                     data=package['portfolio_csv'],
-                    file_name=f"portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    file_name=f"portfolio_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.csv",
                     mime="text/csv",
                     key="download_saved_portfolio_csv"
                 )
@@ -479,7 +529,7 @@ def main():
                 st.download_button(
                     label="📥 투자노트 CSV 다운로드",
                     data=package['notes_csv'],
-                    file_name=f"investment_notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    file_name=f"investment_notes_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.csv",
                     mime="text/csv",
                     key="download_saved_notes_csv"
                 )
@@ -530,7 +580,7 @@ def main():
                     st.download_button(
                         label=f"📥 {selected_sheet} CSV 다운로드",
                         data=csv_data,
-                        file_name=f"{selected_sheet}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        file_name=f"{selected_sheet}_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.csv",
                         mime="text/csv",
                         use_container_width=True
                     )
@@ -5,31 +5,155 @@
 
 import streamlit as st
 import os
+import gzip
+import traceback
 from datetime import datetime
 from daily_briefing_generator import DailyBriefingGenerator
 
+# 다운로드 파일명에 붙는 생성 시각 형식
+FILE_TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
 
+# 이 크기(바이트)를 넘는 개별 시트 CSV는 gzip으로 압축해서 내려받음
+GZIP_THRESHOLD_BYTES = 256_000
+
+# CSV 탭에서 미리보기로 보여줄 최대 행 수
+CSV_PREVIEW_ROWS = 20
+
+# 분석 기간 선택지 → 프롬프트에 들어갈 시간 범위 텍스트
+TIME_WINDOW_TEXTS = {
+    '24시간': "지난 24시간 동안",
+    '48시간': "지난 48시간 동안",
+    '72시간': "지난 72시간 동안",
+    '1주일': "지난 1주일 동안",
+}
+DEFAULT_TIME_WINDOW_TEXT = TIME_WINDOW_TEXTS['24시간']
+
+
+@st.cache_data(ttl=300, show_spinner=False)
 def get_secret(key):
-    """환경변수 또는 Streamlit secrets에서 값을 가져옵니다."""
+    """환경변수 또는 Streamlit secrets에서 값을 가져옵니다 (5분 동안 캐시하여 secrets 변경도 재시작 없이 반영)"""
     try:
         return st.secrets[key]
     except:
         return os.getenv(key)
 
 
+def show_error_details():
+    """APP_DEBUG가 설정된 경우에만 현재 예외의 traceback을 표시합니다."""
+    if get_secret('APP_DEBUG'):
+        with st.expander("상세 오류"):
+            st.code(traceback.format_exc())
+
+
+def run_safely(error_label: str, func, *args, **kwargs):
+    """함수를 실행하고, 예외가 나면 오류 메시지를 표시한 뒤 None을 반환합니다."""
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        st.error(f"❌ {error_label}: {e}")
+        show_error_details()
+        return None
+
+
 def get_time_window_text(selection: str) -> str:
     """UI 선택에 따라 시간 범위 텍스트를 반환합니다."""
-    if "48시간" in selection:
-        return "지난 48시간 동안"
-    if "72시간" in selection:
-        return "지난 72시간 동안"
-    if "1주일" in selection:
-        return "지난 1주일 동안"
-    return "지난 24시간 동안" # Default
+    return TIME_WINDOW_TEXTS.get(selection, DEFAULT_TIME_WINDOW_TEXT)
+
+
+@st.cache_resource
+def get_briefing_generator(spreadsheet_id: str) -> DailyBriefingGenerator:
+    """데일리 브리핑 생성기 (rerun마다 구글 인증을 다시 하지 않도록 재사용)"""
+    return DailyBriefingGenerator(spreadsheet_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_briefing_package(_generator, spreadsheet_id: str, time_window_text: str) -> dict:
+    """완전한 패키지 생성 (1분 안에 다시 누르면 시트를 다시 읽지 않고 캐시된 패키지 사용)"""
+    return _generator.generate_complete_package(time_window_text)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_sheet_csv(_generator, spreadsheet_id: str, sheet_name: str) -> tuple:
+    """
+    시트 CSV 다운로드 데이터 준비 (1분 동안 캐시)
+    
+    Returns:
+        tuple: (데이터 bytes, 파일 확장자, MIME 타입). 큰 CSV는 한 번만 gzip 압축해서 반환
+    """
+    csv_bytes = _generator.get_data_as_csv_bytes(sheet_name)
+    if len(csv_bytes) > GZIP_THRESHOLD_BYTES:
+        return gzip.compress(csv_bytes, compresslevel=5), ".csv.gz", "application/gzip"
+    return csv_bytes, ".csv", "text/csv"
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_sheet_names(_generator, spreadsheet_id: str) -> list:
+    """시트 목록 조회 (자주 바뀌지 않으므로 5분 동안 캐시)"""
+    return _generator.get_available_sheets()
+
+
+def clear_briefing_data_cache():
+    """캐시된 시트 데이터를 비워 다음 요청 때 새로 읽도록 함"""
+    get_briefing_package.clear()
+    get_sheet_csv.clear()
+    get_sheet_names.clear()
+
+
+@st.fragment
+def render_individual_features(generator, spreadsheet_id: str, time_window_text: str):
+    """개별 기능(프롬프트만 생성 / CSV만 다운로드) 영역을 렌더링합니다."""
+    st.markdown("---")
+    st.subheader("🔧 개별 기능")
+    
+    # 선택한 기능만 렌더링 (선택하지 않은 쪽의 위젯과 시트 목록 조회는 실행하지 않음)
+    feature = st.radio(
+        "기능 선택",
+        ("🤖 프롬프트만 생성", "📥 CSV만 다운로드"),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="individual_feature"
+    )
+    
+    if feature == "🤖 프롬프트만 생성":
+        if st.button("🤖 프롬프트 생성", use_container_width=True):
+            with st.spinner("🤖 프롬프트를 생성하고 있습니다..."):
+                prompt = run_safely("프롬프트 생성 실패", generator.generate_complete_prompt, time_window_text)
+            if prompt:
+                st.session_state['last_prompt'] = (time_window_text, prompt)
+        
+        # 마지막으로 생성한 프롬프트를 재사용 (같은 분석 기간이면 다시 생성하지 않음)
+        last_prompt = st.session_state.get('last_prompt')
+        if last_prompt and last_prompt[0] == time_window_text:
+            st.code(last_prompt[1], language="text")
+    
+    else:
+        available_sheets = get_sheet_names(generator, spreadsheet_id)
+        if not available_sheets:
+            # 조회 실패로 빈 목록이 캐시되지 않도록 비움
+            get_sheet_names.clear()
+        selected_sheet = st.selectbox("시트 선택", available_sheets)
+        if st.button("📥 CSV 다운로드", use_container_width=True):
+            download = run_safely("CSV 다운로드 실패", get_sheet_csv, generator, spreadsheet_id, selected_sheet)
+            if download and download[0]:
+                csv_data, extension, mime = download
+                st.download_button(
+                    label=f"📥 {selected_sheet} CSV 다운로드",
+                    data=csv_data,
+                    file_name=f"{selected_sheet}_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}{extension}",
+                    mime=mime,
+                    use_container_width=True
+                )
+            elif download is not None:
+                st.warning("다운로드할 데이터가 없습니다.")
 
 
+@st.fragment
 def render_daily_briefing_page():
-    """데일리 브리핑 생성기 페이지를 렌더링합니다."""
+    """데일리 브리핑 생성기 페이지를 렌더링합니다.
+
+    fragment로 감싸 페이지 안의 버튼을 눌러도 이 페이지만 다시 실행되고
+    사이드바와 계좌 로딩은 다시 실행되지 않습니다.
+    """
     
     # 페이지 헤더
     st.markdown("""
@@ -61,204 +185,169 @@ def render_daily_briefing_page():
         """, unsafe_allow_html=True)
         return
     
-    # 데일리 브리핑 생성기 import
     try:
-        from daily_briefing_generator import DailyBriefingGenerator
-        DAILY_BRIEFING_AVAILABLE = True
-    except ImportError as e:
-        st.error(f"❌ 데일리 브리핑 생성기를 불러올 수 없습니다: {e}")
-        DAILY_BRIEFING_AVAILABLE = False
-    
-    if DAILY_BRIEFING_AVAILABLE:
-        try:
-            # 데일리 브리핑 생성기 초기화
-            generator = DailyBriefingGenerator(spreadsheet_id)
-            
-            # 기능 설명
-            st.info("""
-            **📊 데일리 브리핑 생성기**
-            • 포트폴리오와 투자 노트 데이터 통합 분석
-            • 전문적인 데일리 브리핑 프롬프트 생성
-            • CSV 파일 다운로드 기능 포함
-            • Deep Research에 바로 사용 가능한 완성된 패키지 제공
-            """)
-            
-            # 시간 범위 선택
-            st.subheader("⏰ 분석 기간 선택")
-            time_window_selection = st.radio(
-                "분석 기간을 선택하세요:",
-                ('24시간', '48시간', '72시간', '1주일'),
-                horizontal=True,
-                help="몇 일 동안의 뉴스를 분석할지 선택하세요"
-            )
-            
-            time_window_text = get_time_window_text(time_window_selection)
-            st.info(f"📅 선택된 분석 기간: **{time_window_text}**")
-            
-            # 완전한 패키지 생성 기능
-            st.subheader("🎯 완전한 패키지 생성")
-            st.info("""
-            **🎯 원클릭 완전 자동화**
-            • 클릭 한 번으로 모든 재료 준비 완료
-            • 포트폴리오 CSV + 투자노트 CSV + 완성된 프롬프트
-            • 딥 리서치에 바로 사용할 수 있는 완전한 패키지
-            • 더 이상 수동 작업 불필요!
-            """)
-            
-            if st.button("🎯 완전한 패키지 생성", type="primary", use_container_width=True):
-                try:
-                    with st.spinner("🚀 모든 재료를 준비하고 있습니다... (최대 2분 소요)"):
-                        # 완전한 패키지 생성
-                        package = generator.generate_complete_package(time_window_text)
+        # 데일리 브리핑 생성기 초기화
+        generator = get_briefing_generator(spreadsheet_id)
+        
+        # 기능 설명
+        st.info("""
+        **📊 데일리 브리핑 생성기**
+        • 포트폴리오와 투자 노트 데이터 통합 분석
+        • 전문적인 데일리 브리핑 프롬프트 생성
+        • CSV 파일 다운로드 기능 포함
+        • Deep Research에 바로 사용 가능한 완성된 패키지 제공
+        """)
+        
+        # 시간 범위 선택
+        st.subheader("⏰ 분석 기간 선택")
+        time_window_selection = st.radio(
+            "분석 기간을 선택하세요:",
+            tuple(TIME_WINDOW_TEXTS),
+            horizontal=True,
+            help="몇 일 동안의 뉴스를 분석할지 선택하세요"
+        )
+        
+        time_window_text = get_time_window_text(time_window_selection)
+        st.info(f"📅 선택된 분석 기간: **{time_window_text}**")
+        
+        # 완전한 패키지 생성 기능
+        st.subheader("🎯 완전한 패키지 생성")
+        st.info("""
+        **🎯 원클릭 완전 자동화**
+        • 클릭 한 번으로 모든 재료 준비 완료
+        • 포트폴리오 CSV + 투자노트 CSV + 완성된 프롬프트
+        • 딥 리서치에 바로 사용할 수 있는 완전한 패키지
+        • 더 이상 수동 작업 불필요!
+        """)
+        
+        if st.button("🔄 시트 데이터 새로고침", help="1분 동안 캐시된 포트폴리오/투자 노트 데이터를 비우고 다시 읽습니다"):
+            clear_briefing_data_cache()
+            st.success("✅ 캐시를 비웠습니다. 다음 생성 시 시트를 새로 읽습니다.")
+        
+        if st.button("🎯 완전한 패키지 생성", type="primary", use_container_width=True):
+            try:
+                with st.spinner("🚀 모든 재료를 준비하고 있습니다... (최대 2분 소요)"):
+                    # 완전한 패키지 생성
+                    package = get_briefing_package(generator, spreadsheet_id, time_window_text)
+                    
+                    if 'error' in package:
+                        # 실패한 결과는 캐시에 남기지 않음
+                        get_briefing_package.clear()
+                        st.error(f"❌ 패키지 생성 실패: {package['error']}")
+                        return
+                    
+                    # 성공 메시지
+                    st.success("🎉 완전한 패키지가 준비되었습니다!")
+                    st.info(f"📅 생성 시간: {package['timestamp']}")
+                    
+                    # 탭으로 구분하여 표시
+                    tab1, tab2, tab3, tab4 = st.tabs(["📋 완성된 프롬프트", "📊 포트폴리오 CSV", "📝 투자노트 CSV", "📈 데이터 미리보기"])
+                    
+                    # 다운로드 파일명에 쓸 시각은 한 번만 계산해서 두 CSV에 함께 사용
+                    file_timestamp = datetime.now().strftime(FILE_TIMESTAMP_FORMAT)
+                    
+                    with tab1:
+                        st.markdown("### 🎯 Deep Research에 바로 사용할 프롬프트")
                         
-                        if 'error' in package:
-                            st.error(f"❌ 패키지 생성 실패: {package['error']}")
-                            return
+                        # 프롬프트 타입 표시
+                        st.markdown("""
+                        <div style="background-color: #d4edda; padding: 1rem; border-radius: 8px; border-left: 4px solid #28a745; margin-bottom: 1rem;">
+                            <h4 style="color: #155724; margin: 0;">🎯 데일리 브리핑 프롬프트</h4>
+                            <p style="color: #155724; margin: 0.5rem 0 0 0; font-size: 0.9rem;">매크로 분석과 포트폴리오 데이터를 종합한 완성된 프롬프트입니다</p>
+                        </div>
+                        """, unsafe_allow_html=True)
                         
-                        # 성공 메시지
-                        st.success("🎉 완전한 패키지가 준비되었습니다!")
-                        st.info(f"📅 생성 시간: {package['timestamp']}")
+                        # 프롬프트는 한 번만 렌더링 (st.code의 복사 버튼으로 바로 복사 가능)
+                        st.code(package['complete_prompt'], language="text")
                         
-                        # 탭으로 구분하여 표시
-                        tab1, tab2, tab3, tab4 = st.tabs(["📋 완성된 프롬프트", "📊 포트폴리오 CSV", "📝 투자노트 CSV", "📈 데이터 미리보기"])
+                        # 복사 방법 안내
+                        st.markdown("""
+                        <div style="background-color: #fff3cd; padding: 1rem; border-radius: 8px; border-left: 4px solid #ffc107; margin: 1rem 0;">
+                            <h5 style="color: #856404; margin: 0;">📋 복사 방법</h5>
+                            <ol style="color: #856404; margin: 0.5rem 0 0 0; padding-left: 1.5rem;">
+                                <li>위 프롬프트 상자 오른쪽 위의 복사 버튼을 클릭</li>
+                                <li>Deep Research에 붙여넣기 (Ctrl+V 또는 Cmd+V)</li>
+                            </ol>
+                        </div>
+                        """, unsafe_allow_html=True)
                         
-                        with tab1:
-                            st.markdown("### 🎯 Deep Research에 바로 사용할 프롬프트")
-                            
-                            # 프롬프트 타입 표시
-                            st.markdown("""
-                            <div style="background-color: #d4edda; padding: 1rem; border-radius: 8px; border-left: 4px solid #28a745; margin-bottom: 1rem;">
-                                <h4 style="color: #155724; margin: 0;">🎯 데일리 브리핑 프롬프트</h4>
-                                <p style="color: #155724; margin: 0.5rem 0 0 0; font-size: 0.9rem;">매크로 분석과 포트폴리오 데이터를 종합한 완성된 프롬프트입니다</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            st.text_area("완성된 데일리 브리핑 프롬프트", package['complete_prompt'], height=600)
-                            
-                            # 복사 방법 안내
-                            st.markdown("""
-                            <div style="background-color: #fff3cd; padding: 1rem; border-radius: 8px; border-left: 4px solid #ffc107; margin: 1rem 0;">
-                                <h5 style="color: #856404; margin: 0;">📋 복사 방법</h5>
-                                <ol style="color: #856404; margin: 0.5rem 0 0 0; padding-left: 1.5rem;">
-                                    <li>위 텍스트 박스에서 전체 텍스트를 선택 (Ctrl+A 또는 Cmd+A)</li>
-                                    <li>복사 (Ctrl+C 또는 Cmd+C)</li>
-                                    <li>Deep Research에 붙여넣기 (Ctrl+V 또는 Cmd+V)</li>
-                                </ol>
-                            </div>
-                            """, unsafe_allow_html=True)
+                        st.success("💡 이 프롬프트를 Deep Research에 붙여넣으세요!")
+                    
+                    with tab2:
+                        st.markdown("### 📊 포트폴리오 CSV 파일")
+                        if package['portfolio_csv']:
+                            # 전체 CSV 대신 앞부분만 표로 미리보기
+                            if package['portfolio_df'] is not None:
+                                st.dataframe(package['portfolio_df'].head(CSV_PREVIEW_ROWS), use_container_width=True)
                             
-                            # 프롬프트를 별도로 표시 (선택하기 쉬운 형태)
-                            st.markdown("### 📄 복사용 프롬프트")
-                            st.code(package['complete_prompt'], language="text")
+                            # CSV 다운로드 버튼 (패키지 생성 시 미리 인코딩한 bytes 전달)
+                            st.download_button(
+                                label="📥 포트폴리오 CSV 다운로드",
+                                data=package['portfolio_csv_bytes'],
+                                file_name=f"portfolio_{file_timestamp}.csv",
+                                mime="text/csv",
+                                key="download_portfolio_csv"
+                            )
+                        else:
+                            st.warning("포트폴리오 데이터가 없습니다.")
+                    
+                    with tab3:
+                        st.markdown("### 📝 투자노트 CSV 파일")
+                        if package['notes_csv']:
+                            # 전체 CSV 대신 앞부분만 표로 미리보기
+                            if package['notes_df'] is not None:
+                                st.dataframe(package['notes_df'].head(CSV_PREVIEW_ROWS), use_container_width=True)
                             
-                            st.success("💡 이 프롬프트를 Deep Research에 붙여넣으세요!")
+                            # CSV 다운로드 버튼 (패키지 생성 시 미리 인코딩한 bytes 전달)
+                            st.download_button(
+                                label="📥 투자노트 CSV 다운로드",
+                                data=package['notes_csv_bytes'],
+                                file_name=f"investment_notes_{file_timestamp}.csv",
+                                mime="text/csv",
+                                key="download_notes_csv"
+                            )
+                        else:
+                            st.warning("투자노트 데이터가 없습니다.")
+                    
+                    with tab4:
+                        st.markdown("### 📈 데이터 미리보기")
+                        col1, col2 = st.columns(2)
                         
-                        with tab2:
-                            st.markdown("### 📊 포트폴리오 CSV 파일")
-                            if package['portfolio_csv']:
-                                st.text_area("포트폴리오 데이터 (CSV)", package['portfolio_csv'], height=400)
-                                
-                                # CSV 다운로드 버튼
-                                st.download_button(
-                                    label="📥 포트폴리오 CSV 다운로드",
-                                    data=package['portfolio_csv'],
-                                    file_name=f"portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                    mime="text/csv",
-                                    key="download_portfolio_csv"
-                                )
+                        with col1:
+                            st.subheader("📊 포트폴리오 현황")
+                            if package['portfolio_df'] is not None and not package['portfolio_df'].empty:
+                                st.dataframe(package['portfolio_df'], use_container_width=True)
                             else:
-                                st.warning("포트폴리오 데이터가 없습니다.")
+                                st.info("포트폴리오 데이터가 없습니다.")
                         
-                        with tab3:
-                            st.markdown("### 📝 투자노트 CSV 파일")
-                            if package['notes_csv']:
-                                st.text_area("투자노트 데이터 (CSV)", package['notes_csv'], height=400)
-                                
-                                # CSV 다운로드 버튼
-                                st.download_button(
-                                    label="📥 투자노트 CSV 다운로드",
-                                    data=package['notes_csv'],
-                                    file_name=f"investment_notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                    mime="text/csv",
-                                    key="download_notes_csv"
-                                )
+                        with col2:
+                            st.subheader("📝 투자 노트")
+                            if package['notes_df'] is not None and not package['notes_df'].empty:
+                                st.dataframe(package['notes_df'], use_container_width=True)
                             else:
-                                st.warning("투자노트 데이터가 없습니다.")
+                                st.info("투자 노트 데이터가 없습니다.")
                         
-                        with tab4:
-                            st.markdown("### 📈 데이터 미리보기")
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                st.subheader("📊 포트폴리오 현황")
-                                if package['portfolio_df'] is not None and not package['portfolio_df'].empty:
-                                    st.dataframe(package['portfolio_df'], use_container_width=True)
-                                else:
-                                    st.info("포트폴리오 데이터가 없습니다.")
-                            
-                            with col2:
-                                st.subheader("📝 투자 노트")
-                                if package['notes_df'] is not None and not package['notes_df'].empty:
-                                    st.dataframe(package['notes_df'], use_container_width=True)
-                                else:
-                                    st.info("투자 노트 데이터가 없습니다.")
-                            
-                            # 사용법 안내
-                            st.markdown("---")
-                            st.markdown("### 📖 사용법 안내")
-                            st.info("""
-                            **🎯 Deep Research 사용 방법:**
-                            1. **프롬프트 복사**: 위의 완성된 프롬프트를 복사
-                            2. **CSV 파일 다운로드**: 포트폴리오와 투자노트 CSV 파일을 다운로드
-                            3. **Deep Research 접속**: Gemini Deep Research에 접속
-                            4. **파일 첨부**: 다운로드한 CSV 파일 2개를 첨부
-                            5. **프롬프트 붙여넣기**: 복사한 프롬프트를 붙여넣고 실행
-                            
-                            **✨ 이제 매일 이 과정을 반복하세요!**
-                            """)
-                            
-                except Exception as e:
-                    st.error(f"❌ 완전한 패키지 생성 실패: {e}")
-                    import traceback
-                    st.error(f"상세 오류: {traceback.format_exc()}")
-            
-            # 개별 기능들
-            st.markdown("---")
-            st.subheader("🔧 개별 기능")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("#### 🤖 프롬프트만 생성")
-                if st.button("🤖 프롬프트 생성", use_container_width=True):
-                    try:
-                        with st.spinner("🤖 프롬프트를 생성하고 있습니다..."):
-                            prompt = generator.generate_complete_prompt(time_window_text)
-                            st.text_area("생성된 프롬프트", prompt, height=400)
-                    except Exception as e:
-                        st.error(f"❌ 프롬프트 생성 실패: {e}")
-            
-            with col2:
-                st.markdown("#### 📥 CSV만 다운로드")
-                available_sheets = generator.get_available_sheets()
-                selected_sheet = st.selectbox("시트 선택", available_sheets)
-                if st.button("📥 CSV 다운로드", use_container_width=True):
-                    try:
-                        csv_data = generator.get_data_as_csv(selected_sheet)
-                        if csv_data:
-                            st.download_button(
-                                label=f"📥 {selected_sheet} CSV 다운로드",
-                                data=csv_data,
-                                file_name=f"{selected_sheet}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                mime="text/csv",
-                                use_container_width=True
-                            )
-                        else:
-                            st.warning("다운로드할 데이터가 없습니다.")
-                    except Exception as e:
-                        st.error(f"❌ CSV 다운로드 실패: {e}")
+                        # 사용법 안내
+                        st.markdown("---")
+                        st.markdown("### 📖 사용법 안내")
+                        st.info("""
+                        **🎯 Deep Research 사용 방법:**
+                        1. **프롬프트 복사**: 위의 완성된 프롬프트를 복사
+                        2. **CSV 파일 다운로드**: 포트폴리오와 투자노트 CSV 파일을 다운로드
+                        3. **Deep Research 접속**: Gemini Deep Research에 접속
+                        4. **파일 첨부**: 다운로드한 CSV 파일 2개를 첨부
+                        5. **프롬프트 붙여넣기**: 복사한 프롬프트를 붙여넣고 실행
+                        
+                        **✨ 이제 매일 이 과정을 반복하세요!**
+                        """)
                         
-        except Exception as e:
-            st.error(f"❌ 데일리 브리핑 생성기 V2 초기화 실패: {e}")
-            import traceback
-            st.error(f"상세 오류: {traceback.format_exc()}")
+            except Exception as e:
+                st.error(f"❌ 완전한 패키지 생성 실패: {e}")
+                show_error_details()
+        
+        # 개별 기능들 (별도 fragment라서 버튼을 눌러도 이 영역만 다시 실행)
+        render_individual_features(generator, spreadsheet_id, time_window_text)
+        
+    except Exception as e:
+        st.error(f"❌ 데일리 브리핑 생성기 V2 초기화 실패: {e}")
+        show_error_details()
@@ -0,0 +1,191 @@
+"""
+Google API 클라이언트 공용 모듈
+서비스 계정 인증 정보와 Google Sheets 서비스를 한 번만 생성하여 여러 모듈에서 공유합니다.
+"""
+
+import os
+import time
+import random
+import functools
+import threading
+import httplib2
+import google_auth_httplib2
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+# orjson이 설치되어 있으면 더 빠른 JSON 파서를 사용
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+SPREADSHEETS_SCOPE = 'https://www.googleapis.com/auth/spreadsheets'
+SPREADSHEETS_READONLY_SCOPE = 'https://www.googleapis.com/auth/spreadsheets.readonly'
+
+# 할당량 초과(429) 또는 일시적 서버 과부하(503)일 때만 재시도
+RETRYABLE_STATUS_CODES = (429, 503)
+MAX_RETRY_ATTEMPTS = 6
+MAX_RETRY_DELAY = 30  # 초
+
+# 프로세스 전체에서 동시에 실행되는 Sheets 요청 수 제한
+_request_slots = threading.BoundedSemaphore(8)
+
+HTTP_TIMEOUT = 30  # 초
+
+# Gemini 요청 제한: 프로세스 전체 동시 요청 수와 재시도 횟수
+GEMINI_MAX_CONCURRENCY = 4
+GEMINI_MAX_ATTEMPTS = 4
+GEMINI_RETRYABLE_MARKERS = ('429', '503', 'RESOURCE_EXHAUSTED', 'UNAVAILABLE')
+_gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+# 스레드별 HTTP 연결 (httplib2.Http는 스레드 간 공유가 안전하지 않음)
+_thread_local = threading.local()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_service_account_info() -> dict:
+    """환경변수의 서비스 계정 JSON을 한 번만 파싱 (환경변수가 없으면 None)"""
+    service_account_json_str = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
+    if not service_account_json_str:
+        return None
+    return _json.loads(service_account_json_str)
+
+
+@functools.lru_cache(maxsize=None)
+def get_credentials(scopes: tuple = (SPREADSHEETS_SCOPE,)):
+    """
+    서비스 계정 인증 정보를 생성합니다. (scope 조합별로 1회만 생성)
+
+    Args:
+        scopes (tuple): 요청할 OAuth scope 목록
+
+    Returns:
+        service_account.Credentials: 서비스 계정 인증 정보
+    """
+    # 환경변수에서 서비스 계정 JSON 읽기 시도
+    service_account_info = _load_service_account_info()
+    if service_account_info:
+        credentials = service_account.Credentials.from_service_account_info(
+            service_account_info,
+            scopes=list(scopes)
+        )
+        print("✅ 구글 API 인증이 완료되었습니다. (환경변수에서 JSON)")
+    else:
+        # 파일에서 JSON 읽기 시도
+        credentials = service_account.Credentials.from_service_account_file(
+            'service-account-key.json',
+            scopes=list(scopes)
+        )
+        print("✅ 구글 API 인증이 완료되었습니다. (파일에서 JSON)")
+
+    return credentials
+
+
+@functools.lru_cache(maxsize=None)
+def get_sheets_service(scopes: tuple = (SPREADSHEETS_SCOPE,)):
+    """
+    Google Sheets API 서비스를 반환합니다. (scope 조합별로 프로세스당 1회만 생성)
+
+    Streamlit은 같은 프로세스에서 스크립트를 다시 실행하므로, 이 캐시는
+    rerun과 세션 사이에서도 그대로 재사용됩니다.
+
+    Args:
+        scopes (tuple): 요청할 OAuth scope 목록
+
+    Returns:
+        googleapiclient.discovery.Resource: Sheets API 서비스
+    """
+    credentials = get_credentials(scopes)
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+    # 패키지에 포함된 디스커버리 문서를 사용하여 HTTP 다운로드와 파일 캐시를 모두 생략
+    return build('sheets', 'v4', http=http, cache_discovery=False, static_discovery=True)
+
+
+def _get_thread_http(shared_http):
+    """
+    현재 스레드 전용 인증 HTTP 객체를 반환합니다.
+
+    스레드마다 하나의 연결을 만들어 두고 계속 재사용하므로, 요청마다 TLS 연결을
+    새로 맺지 않으면서도 여러 스레드가 동시에 안전하게 요청할 수 있습니다.
+    """
+    credentials = getattr(shared_http, 'credentials', None)
+    if credentials is None:
+        return shared_http
+
+    http_pool = getattr(_thread_local, 'http_pool', None)
+    if http_pool is None:
+        http_pool = _thread_local.http_pool = {}
+
+    http = http_pool.get(id(credentials))
+    if http is None:
+        http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+        http_pool[id(credentials)] = http
+    return http
+
+
+def _get_retry_delay(error: HttpError, attempt: int) -> float:
+    """Retry-After 헤더가 있으면 그 값을, 없으면 지터가 포함된 지수 백오프 대기 시간을 반환"""
+    retry_after = error.resp.get('retry-after') if error.resp is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(2 ** attempt, MAX_RETRY_DELAY) + random.uniform(0, 1)
+
+
+def execute_with_retry(request, max_attempts: int = MAX_RETRY_ATTEMPTS):
+    """
+    Google API 요청을 실행합니다. 429/503 응답이면 백오프 후 재시도합니다.
+
+    Args:
+        request: execute()를 호출할 Google API 요청 객체
+        max_attempts (int): 최대 시도 횟수
+
+    Returns:
+        dict: API 응답
+    """
+    for attempt in range(max_attempts):
+        try:
+            with _request_slots:
+                return request.execute(http=_get_thread_http(request.http))
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_STATUS_CODES or attempt == max_attempts - 1:
+                raise
+            delay = _get_retry_delay(e, attempt)
+            print(f"⏳ Google API 요청 제한({e.resp.status}) - {delay:.1f}초 후 재시도합니다... ({attempt + 1}/{max_attempts})")
+            time.sleep(delay)
+
+
+def _is_retryable_gemini_error(error: Exception) -> bool:
+    """Gemini 할당량 초과(429) 또는 일시적 과부하(503) 오류인지 확인"""
+    if getattr(error, 'code', None) in RETRYABLE_STATUS_CODES:
+        return True
+    message = str(error)
+    return any(marker in message for marker in GEMINI_RETRYABLE_MARKERS)
+
+
+def generate_content_with_retry(client, model: str, contents, max_attempts: int = GEMINI_MAX_ATTEMPTS):
+    """
+    Gemini generate_content를 호출합니다. 429/503 오류면 지터가 포함된 지수 백오프 후 재시도합니다.
+
+    Args:
+        client: google.genai.Client
+        model (str): 모델 이름
+        contents: 요청 내용
+        max_attempts (int): 최대 시도 횟수
+
+    Returns:
+        GenerateContentResponse: Gemini 응답
+    """
+    for attempt in range(max_attempts):
+        try:
+            with _gemini_slots:
+                return client.models.generate_content(model=model, contents=contents)
+        except Exception as e:
+            if not _is_retryable_gemini_error(e) or attempt == max_attempts - 1:
+                raise
+            delay = min(2 ** (attempt + 1), MAX_RETRY_DELAY) + random.uniform(0, 1)
+            print(f"⏳ Gemini 요청 제한/과부하 - {delay:.1f}초 후 재시도합니다... ({attempt + 1}/{max_attempts})")
+            time.sleep(delay)
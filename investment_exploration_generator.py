@@ -52,6 +52,7 @@ def generate_exploration_prompt(investment_idea: str, exclusions: str = "") -> s
     
     return master_prompt_template.strip()
 
+@st.fragment
 def render_exploration_page():
     """유망 종목 탐색기 페이지 렌더링"""
     
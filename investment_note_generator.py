@@ -1,5 +1,9 @@
 import os
 import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 import pandas as pd
 from datetime import datetime
 from google import genai
@@ -7,6 +11,11 @@ from google.genai import types
 from google.oauth2 import service_account
 from typing import Dict, Optional, List
 from investment_notes_manager import InvestmentNotesManager
+from google_clients import generate_content_with_retry
+
+# 같은 보고서에 대한 AI 분석 결과 재사용 (미리보기 후 저장 시 Gemini 재호출 방지)
+ANALYSIS_CACHE_TTL = 3600  # 초
+ANALYSIS_CACHE_SIZE = 16
 
 class InvestmentNoteGenerator:
     """기업 보고서를 분석하여 투자 노트 초안을 자동 생성하는 클래스"""
@@ -15,6 +24,8 @@ class InvestmentNoteGenerator:
         self.spreadsheet_id = spreadsheet_id
         self.notes_manager = InvestmentNotesManager(spreadsheet_id)
         self.client = None
+        self._analysis_cache = OrderedDict()  # 입력 해시 -> (저장 시각, AI 분석 결과)
+        self._analysis_cache_lock = threading.Lock()
         self.model_name = "gemini-2.5-pro"
         self.gemini_api_key = os.getenv('GOOGLE_API_KEY')
         if not self.gemini_api_key:
@@ -32,82 +43,86 @@ class InvestmentNoteGenerator:
             print(f"❌ Gemini API 설정 실패: {e}")
             raise
     
+    @staticmethod
+    def _analysis_cache_key(company_name: str, stock_code: str, report_content: str) -> str:
+        """분석 입력(기업명, 종목코드, 보고서 원문)의 해시"""
+        return hashlib.sha1("\x1f".join((company_name, stock_code, report_content)).encode('utf-8')).hexdigest()
+    
+    def _get_cached_analysis(self, cache_key: str) -> Optional[Dict]:
+        """TTL 안에 저장된 AI 분석 결과 반환 (없으면 None)"""
+        with self._analysis_cache_lock:
+            entry = self._analysis_cache.get(cache_key)
+            if entry is None:
+                return None
+            saved_at, analysis_result = entry
+            if time.time() - saved_at > ANALYSIS_CACHE_TTL:
+                del self._analysis_cache[cache_key]
+                return None
+            self._analysis_cache.move_to_end(cache_key)
+            return analysis_result
+    
+    def _store_analysis(self, cache_key: str, analysis_result: Dict):
+        """AI 분석 결과 저장 (오래된 항목부터 제거)"""
+        with self._analysis_cache_lock:
+            self._analysis_cache[cache_key] = (time.time(), analysis_result)
+            self._analysis_cache.move_to_end(cache_key)
+            while len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+    
     def generate_investment_note_from_report(self, company_name: str, stock_code: str, report_content: str) -> Dict:
-        """기업 보고서를 분석하여 투자 노트 초안 생성"""
-        max_retries = 3
-        retry_delay = 2  # 초
+        """기업 보고서를 분석하여 투자 노트 초안 생성 (같은 입력은 1시간 동안 AI 분석 결과 재사용)"""
+        cache_key = self._analysis_cache_key(company_name, stock_code, report_content)
+        cached_result = self._get_cached_analysis(cache_key)
+        if cached_result is not None:
+            print("♻️ 같은 보고서의 AI 분석 결과를 재사용합니다.")
+            return self._structure_investment_note(company_name, stock_code, cached_result)
         
-        for attempt in range(max_retries):
-            try:
-                print(f"🤖 AI 분석 시도 {attempt + 1}/{max_retries}...")
-                
-                # 메타 프롬프트 생성
-                meta_prompt = self._create_analysis_prompt(company_name, stock_code, report_content)
-                
-                # AI 분석 요청
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=meta_prompt
-                )
-                
-                # 응답 파싱
-                try:
-                    response_text = response.text
-                    if response_text:
-                        analysis_result = self._parse_ai_response(response_text)
-                    else:
-                        raise ValueError("AI 응답이 비어있습니다.")
-                except Exception as text_error:
-                    print(f"⚠️ response.text 실패, fallback 방법 시도: {str(text_error)}")
-                    
-                    # 새로운 API의 fallback 방법 시도
-                    if hasattr(response, 'candidates') and response.candidates:
-                        candidate = response.candidates[0]
-                        if hasattr(candidate, 'content') and candidate.content:
-                            if hasattr(candidate.content, 'parts') and candidate.content.parts:
-                                part = candidate.content.parts[0]
-                                if hasattr(part, 'text'):
-                                    response_text = part.text
-                                    if response_text:
-                                        analysis_result = self._parse_ai_response(response_text)
-                                    else:
-                                        raise ValueError("AI 응답이 비어있습니다.")
-                                else:
-                                    raise ValueError("AI 응답에서 텍스트를 추출할 수 없습니다.")
+        print("🤖 AI 분석 중...")
+        
+        # 메타 프롬프트 생성
+        meta_prompt = self._create_analysis_prompt(company_name, stock_code, report_content)
+        
+        # AI 분석 요청 (429/503 오류는 백오프 후 재시도, 다른 오류는 즉시 실패)
+        response = generate_content_with_retry(self.client, self.model_name, meta_prompt)
+        
+        # 응답 파싱
+        try:
+            response_text = response.text
+            if response_text:
+                analysis_result = self._parse_ai_response(response_text)
+            else:
+                raise ValueError("AI 응답이 비어있습니다.")
+        except Exception as text_error:
+            print(f"⚠️ response.text 실패, fallback 방법 시도: {str(text_error)}")
+            
+            # 새로운 API의 fallback 방법 시도
+            if hasattr(response, 'candidates') and response.candidates:
+                candidate = response.candidates[0]
+                if hasattr(candidate, 'content') and candidate.content:
+                    if hasattr(candidate.content, 'parts') and candidate.content.parts:
+                        part = candidate.content.parts[0]
+                        if hasattr(part, 'text'):
+                            response_text = part.text
+                            if response_text:
+                                analysis_result = self._parse_ai_response(response_text)
                             else:
-                                raise ValueError("AI 응답에서 parts를 찾을 수 없습니다.")
+                                raise ValueError("AI 응답이 비어있습니다.")
                         else:
-                            raise ValueError("AI 응답에서 content를 찾을 수 없습니다.")
+                            raise ValueError("AI 응답에서 텍스트를 추출할 수 없습니다.")
                     else:
-                        raise ValueError("AI 응답에서 candidates를 찾을 수 없습니다.")
-                
-                # 투자 노트 데이터 구조화
-                investment_note = self._structure_investment_note(company_name, stock_code, analysis_result)
-                
-                print(f"✅ AI 분석 성공 (시도 {attempt + 1})")
-                return investment_note
-                
-            except Exception as e:
-                error_msg = str(e)
-                print(f"❌ AI 분석 실패 (시도 {attempt + 1}): {error_msg}")
-                
-                # 503 오류인 경우 재시도
-                if "503" in error_msg or "UNAVAILABLE" in error_msg:
-                    if attempt < max_retries - 1:
-                        print(f"⏳ {retry_delay}초 후 재시도합니다...")
-                        import time
-                        time.sleep(retry_delay)
-                        retry_delay *= 2  # 지수 백오프
-                        continue
-                    else:
-                        print("❌ 최대 재시도 횟수 초과. 서버가 과부하 상태입니다.")
-                        raise e
+                        raise ValueError("AI 응답에서 parts를 찾을 수 없습니다.")
                 else:
-                    # 다른 오류는 즉시 실패
-                    raise e
+                    raise ValueError("AI 응답에서 content를 찾을 수 없습니다.")
+            else:
+                raise ValueError("AI 응답에서 candidates를 찾을 수 없습니다.")
         
-        # 모든 재시도 실패
-        raise Exception("AI 분석에 실패했습니다.")
+        self._store_analysis(cache_key, analysis_result)
+        
+        # 투자 노트 데이터 구조화
+        investment_note = self._structure_investment_note(company_name, stock_code, analysis_result)
+        
+        print("✅ AI 분석 성공")
+        return investment_note
     
     def _create_analysis_prompt(self, company_name: str, stock_code: str, report_content: str) -> str:
         """AI 분석을 위한 메타 프롬프트 생성"""
@@ -379,8 +394,10 @@ def main():
         
     except Exception as e:
         print(f"❌ 테스트 실패: {e}")
-        import traceback
-        print(f"상세 오류: {traceback.format_exc()}")
+        # 전체 traceback은 APP_DEBUG가 설정된 경우에만 출력
+        if os.getenv('APP_DEBUG'):
+            import traceback
+            print(f"상세 오류: {traceback.format_exc()}")
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,18 @@
-import os
-import json
 import pandas as pd
 from datetime import datetime
-from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from typing import List, Dict, Optional, Tuple
+from google_clients import get_credentials, execute_with_retry, SPREADSHEETS_SCOPE
+
+# 투자_노트 시트 전체(헤더 포함) 읽기 범위
+NOTES_RANGE = '투자_노트!A:Z'
+
+# 포트폴리오_상태 값
+NOTE_STATUSES = ('보유중', '관심종목', '매도완료')
+
+class NotesSheetNotFoundError(Exception):
+    """'투자_노트' 시트가 스프레드시트에 없을 때 발생"""
 
 class InvestmentNotesManager:
     """투자 노트 관리를 위한 클래스"""
@@ -17,80 +25,93 @@ class InvestmentNotesManager:
     def _authenticate_google(self):
         """구글 API 인증"""
         try:
-            # 환경변수에서 서비스 계정 JSON 읽기 시도
-            service_account_json = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
-            
-            if service_account_json:
-                # 환경변수에서 JSON 문자열을 파싱
-                service_account_info = json.loads(service_account_json)
-                credentials = service_account.Credentials.from_service_account_info(
-                    service_account_info,
-                    scopes=['https://www.googleapis.com/auth/spreadsheets']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (환경변수에서 JSON)")
-            else:
-                # 파일에서 읽기 시도
-                credentials = service_account.Credentials.from_service_account_file(
-                    'service-account-key.json',
-                    scopes=['https://www.googleapis.com/auth/spreadsheets']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (파일에서 JSON)")
-            
-            self.service = build('sheets', 'v4', credentials=credentials)
+            # 서비스 계정 JSON은 프로세스당 한 번만 파싱 (google_clients 캐시 재사용)
+            credentials = get_credentials((SPREADSHEETS_SCOPE,))
+            
+            # 패키지에 포함된 디스커버리 문서 사용 (HTTP 다운로드와 파일 캐시 생략)
+            self.service = build('sheets', 'v4', credentials=credentials, cache_discovery=False, static_discovery=True)
         except Exception as e:
             print(f"❌ 구글 API 인증 실패: {e}")
             raise
     
     def read_investment_notes(self) -> pd.DataFrame:
-        """투자_노트 시트에서 투자 노트 데이터 읽기"""
+        """투자_노트 시트에서 투자 노트 데이터 읽기 (헤더와 데이터를 요청 한 번으로 읽음)"""
         try:
-            # 투자_노트 시트 확인
-            spreadsheet = self.service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
-            
-            sheet_names = [sheet['properties']['title'] for sheet in spreadsheet['sheets']]
-            print(f"📋 사용 가능한 시트: {sheet_names}")
+            try:
+                data_result = execute_with_retry(self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=NOTES_RANGE  # 충분히 넓은 범위로 헤더와 데이터 읽기
+                ))
+            except HttpError as e:
+                # 존재하지 않는 시트 범위는 400 오류로 응답됨
+                if e.resp.status == 400:
+                    raise NotesSheetNotFoundError("'투자_노트' 시트가 없습니다. 먼저 시트를 생성해주세요.")
+                raise
+            
+            print("📊 '투자_노트' 시트를 사용합니다.")
+            return self._notes_values_to_df(data_result.get('values', []))
             
-            # 투자_노트 시트가 있으면 사용
-            if '투자_노트' in sheet_names:
-                print("📊 '투자_노트' 시트를 사용합니다.")
-            else:
-                raise Exception("'투자_노트' 시트가 없습니다. 먼저 시트를 생성해주세요.")
-            
-            # 먼저 헤더만 읽어서 컬럼 수 확인
-            header_result = self.service.spreadsheets().values().get(
+        except Exception as e:
+            print(f"❌ 투자 노트 데이터 읽기 실패: {e}")
+            raise
+    
+    def read_notes_and_portfolio(self, portfolio_sheet: str = 'Portfolio') -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """투자 노트와 포트폴리오 시트를 batchGet 요청 한 번으로 함께 읽기
+        
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: (투자 노트, 포트폴리오) - 포트폴리오가 없으면 빈 데이터프레임
+        """
+        try:
+            result = execute_with_retry(self.service.spreadsheets().values().batchGet(
                 spreadsheetId=self.spreadsheet_id,
-                range='투자_노트!A1:Z1'  # 충분히 넓은 범위로 헤더 읽기
-            ).execute()
-            
-            headers = header_result.get('values', [[]])[0]
-            print(f"📋 헤더 컬럼들: {headers}")
-            
-            # 데이터가 있는 행 수 확인
-            data_result = self.service.spreadsheets().values().get(
+                ranges=[NOTES_RANGE, portfolio_sheet]
+            ))
+        except HttpError as e:
+            if e.resp.status != 400:
+                raise
+            # 두 시트 중 하나가 없으면 각각 읽어서 어느 쪽이 없는지 구분
+            notes_df = self.read_investment_notes()
+            return notes_df, self._read_sheet_df(portfolio_sheet)
+        
+        notes_values, portfolio_values = (value_range.get('values', []) for value_range in result.get('valueRanges', []))
+        print("📊 '투자_노트' 시트를 사용합니다.")
+        notes_df = self._notes_values_to_df(notes_values)
+        portfolio_df = pd.DataFrame(portfolio_values[1:], columns=portfolio_values[0]) if portfolio_values else pd.DataFrame()
+        return notes_df, portfolio_df
+    
+    def _read_sheet_df(self, sheet_name: str) -> pd.DataFrame:
+        """시트 전체를 데이터프레임으로 읽기 (첫 행을 헤더로 사용, 실패 시 빈 데이터프레임)"""
+        try:
+            result = execute_with_retry(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range='투자_노트!A:Z'  # 충분히 넓은 범위로 데이터 읽기
-            ).execute()
-            
-            values = data_result.get('values', [])
+                range=sheet_name
+            ))
+            values = result.get('values', [])
             if not values:
-                # 빈 시트인 경우 기본 헤더 생성
-                return self._create_empty_notes_df()
-            
-            # 데이터프레임 생성 (헤더 제외)
-            df = pd.DataFrame(values[1:], columns=headers)
-            
-            # 마지막_수정일 컬럼을 datetime으로 변환
-            if '마지막_수정일' in df.columns:
-                df['마지막_수정일'] = pd.to_datetime(df['마지막_수정일'], errors='coerce')
-            
-            print(f"✅ 투자 노트 데이터 읽기 완료: {len(df)}개 종목")
-            return df
-            
+                return pd.DataFrame()
+            return pd.DataFrame(values[1:], columns=values[0])
         except Exception as e:
-            print(f"❌ 투자 노트 데이터 읽기 실패: {e}")
-            raise
+            print(f"❌ '{sheet_name}' 시트 읽기 실패: {e}")
+            return pd.DataFrame()
+    
+    def _notes_values_to_df(self, values: List[List[str]]) -> pd.DataFrame:
+        """투자_노트 시트 값(첫 행은 헤더)을 데이터프레임으로 변환"""
+        if not values:
+            # 빈 시트인 경우 기본 헤더 생성
+            return self._create_empty_notes_df()
+        
+        headers = values[0]
+        print(f"📋 헤더 컬럼들: {headers}")
+        
+        # 데이터프레임 생성 (헤더 제외)
+        df = pd.DataFrame(values[1:], columns=headers)
+        
+        # 마지막_수정일 컬럼을 datetime으로 변환
+        if '마지막_수정일' in df.columns:
+            df['마지막_수정일'] = pd.to_datetime(df['마지막_수정일'], errors='coerce')
+        
+        print(f"✅ 투자 노트 데이터 읽기 완료: {len(df)}개 종목")
+        return df
     
     def _create_empty_notes_df(self) -> pd.DataFrame:
         """빈 투자 노트 데이터프레임 생성"""
@@ -118,10 +139,10 @@ class InvestmentNotesManager:
                 'requests': [request]
             }
             
-            self.service.spreadsheets().batchUpdate(
+            execute_with_retry(self.service.spreadsheets().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
                 body=body
-            ).execute()
+            ))
             
             print("✅ '투자_노트' 시트가 생성되었습니다.")
             
@@ -139,12 +160,12 @@ class InvestmentNotesManager:
                 'values': [headers]
             }
             
-            self.service.spreadsheets().values().update(
+            execute_with_retry(self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
                 range=range_name,
                 valueInputOption='RAW',
                 body=body
-            ).execute()
+            ))
             
             print("✅ 기본 헤더가 설정되었습니다.")
             
@@ -307,12 +328,12 @@ class InvestmentNotesManager:
                 'values': data
             }
             
-            self.service.spreadsheets().values().update(
+            execute_with_retry(self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
                 range=range_name,
                 valueInputOption='RAW',
                 body=body
-            ).execute()
+            ))
             
             print(f"✅ 시트 쓰기 완료: {len(data)-1 if len(data) > 1 else 0}개 행")
             
@@ -339,18 +360,21 @@ class InvestmentNotesManager:
             print(f"❌ 투자 노트 조회 실패: {e}")
             return None
     
-    def update_portfolio_status(self, portfolio_df: pd.DataFrame) -> bool:
+    def update_portfolio_status(self, portfolio_df: pd.DataFrame, notes_df: Optional[pd.DataFrame] = None) -> bool:
         """포트폴리오 상태를 투자 노트에 자동 업데이트
         
         주의: 실제 매수/매도 날짜가 아닌 동기화 시점을 기준으로 설정됩니다.
         포트폴리오에는 현재 보유 종목 정보만 있고 매수/매도 이력은 없기 때문입니다.
+        
+        notes_df를 넘기면 시트를 다시 읽지 않고 그 데이터프레임의 상태를 직접 갱신합니다.
         """
         try:
             print("🔄 포트폴리오 상태를 투자 노트에 업데이트 중...")
             print("💡 주의: 매수/매도 날짜는 동기화 시점을 기준으로 설정됩니다.")
             
             # 현재 투자 노트 읽기
-            notes_df = self.read_investment_notes()
+            if notes_df is None:
+                notes_df = self.read_investment_notes()
             
             if notes_df.empty:
                 print("📝 투자 노트가 비어있어 업데이트할 내용이 없습니다.")
@@ -364,60 +388,49 @@ class InvestmentNotesManager:
             note_stocks = set(notes_df['종목코드'].astype(str).tolist())
             print(f"📝 투자 노트 종목코드들: {note_stocks}")
             
-            # 업데이트된 노트 수
-            updated_count = 0
             today = datetime.now().strftime('%Y-%m-%d')
             
-            for idx, note in notes_df.iterrows():
-                stock_code = str(note['종목코드']).strip()
-                stock_name = note['종목명']
-                current_status = note.get('포트폴리오_상태', '')
-                
-                print(f"🔍 검사 중: {stock_name} ({stock_code}) - 현재 상태: '{current_status}'")
-                
-                # 포트폴리오에 있는지 확인
-                in_portfolio = stock_code in portfolio_stocks
-                print(f"   포트폴리오 포함 여부: {in_portfolio}")
-                
-                # 상태 변경이 필요한지 확인
-                if in_portfolio and current_status != '보유중':
-                    # 포트폴리오에 새로 들어온 경우 (또는 처음 동기화하는 경우)
-                    notes_df.at[idx, '포트폴리오_상태'] = '보유중'
-                    
-                    # 최초_매수일 설정 (동기화 시점을 매수일로 간주)
-                    try:
-                        if '최초_매수일' in notes_df.columns:
-                            if pd.isna(notes_df.at[idx, '최초_매수일']) or notes_df.at[idx, '최초_매수일'] == '':
-                                notes_df.at[idx, '최초_매수일'] = today
-                        else:
-                            print(f"⚠️ '최초_매수일' 컬럼이 없습니다. 컬럼 목록: {list(notes_df.columns)}")
-                    except Exception as e:
-                        print(f"⚠️ 최초_매수일 설정 중 오류: {e}")
-                    
-                    updated_count += 1
-                    print(f"✅ {stock_name} ({stock_code}): → 보유중 (매수일: {today})")
-                    
-                elif not in_portfolio and current_status == '보유중':
-                    # 포트폴리오에서 빠진 경우 (매도된 것으로 간주)
-                    notes_df.at[idx, '포트폴리오_상태'] = '매도완료'
-                    
-                    # 최종_매도일 설정 (동기화 시점을 매도일로 간주)
-                    try:
-                        if '최종_매도일' in notes_df.columns:
-                            notes_df.at[idx, '최종_매도일'] = today
-                        else:
-                            print(f"⚠️ '최종_매도일' 컬럼이 없습니다. 컬럼 목록: {list(notes_df.columns)}")
-                    except Exception as e:
-                        print(f"⚠️ 최종_매도일 설정 중 오류: {e}")
-                    
-                    updated_count += 1
-                    print(f"📉 {stock_name} ({stock_code}): 보유중 → 매도완료 (매도일: {today})")
-                
-                elif not in_portfolio and (current_status == '' or pd.isna(current_status)):
-                    # 빈 상태인 경우 관심종목으로 설정
-                    notes_df.at[idx, '포트폴리오_상태'] = '관심종목'
-                    updated_count += 1
-                    print(f"📝 {stock_name} ({stock_code}): 빈 상태 → 관심종목")
+            if '포트폴리오_상태' not in notes_df.columns:
+                notes_df['포트폴리오_상태'] = ''
+            
+            # 행마다 반복하지 않고 열 단위 마스크로 상태 변경 대상을 한 번에 계산
+            stock_codes = notes_df['종목코드'].astype(str).str.strip()
+            current_status = notes_df['포트폴리오_상태']
+            in_portfolio = stock_codes.isin(portfolio_stocks)
+            
+            # 포트폴리오에 새로 들어온 경우 (또는 처음 동기화하는 경우)
+            bought = in_portfolio & (current_status != '보유중')
+            # 포트폴리오에서 빠진 경우 (매도된 것으로 간주)
+            sold = ~in_portfolio & (current_status == '보유중')
+            # 빈 상태인 경우 관심종목으로 설정
+            watching = ~in_portfolio & (current_status.isna() | (current_status == ''))
+            
+            notes_df.loc[bought, '포트폴리오_상태'] = '보유중'
+            notes_df.loc[sold, '포트폴리오_상태'] = '매도완료'
+            notes_df.loc[watching, '포트폴리오_상태'] = '관심종목'
+            
+            # 최초_매수일 / 최종_매도일 설정 (동기화 시점을 매수일/매도일로 간주)
+            if '최초_매수일' in notes_df.columns:
+                first_buy = notes_df['최초_매수일']
+                notes_df.loc[bought & (first_buy.isna() | (first_buy == '')), '최초_매수일'] = today
+            elif bought.any():
+                print(f"⚠️ '최초_매수일' 컬럼이 없습니다. 컬럼 목록: {list(notes_df.columns)}")
+            
+            if '최종_매도일' in notes_df.columns:
+                notes_df.loc[sold, '최종_매도일'] = today
+            elif sold.any():
+                print(f"⚠️ '최종_매도일' 컬럼이 없습니다. 컬럼 목록: {list(notes_df.columns)}")
+            
+            # 변경된 종목만 로그 출력
+            for label, mask in (
+                (f"→ 보유중 (매수일: {today})", bought),
+                (f"보유중 → 매도완료 (매도일: {today})", sold),
+                ("빈 상태 → 관심종목", watching),
+            ):
+                for stock_name, stock_code in zip(notes_df.loc[mask, '종목명'], stock_codes[mask]):
+                    print(f"✅ {stock_name} ({stock_code}): {label}")
+            
+            updated_count = int(bought.sum() + sold.sum() + watching.sum())
             
             # 변경사항이 있으면 시트에 저장
             if updated_count > 0:
@@ -466,13 +479,16 @@ class InvestmentNotesManager:
             print(f"❌ 관심종목 투자 노트 조회 실패: {e}")
             return pd.DataFrame()
     
-    def migrate_existing_notes(self) -> bool:
-        """기존 투자 노트에 새로운 컬럼들을 추가하여 마이그레이션"""
+    def migrate_existing_notes(self, notes_df: Optional[pd.DataFrame] = None) -> bool:
+        """기존 투자 노트에 새로운 컬럼들을 추가하여 마이그레이션
+        
+        notes_df를 넘기면 시트를 다시 읽지 않고 그 데이터프레임에 컬럼을 추가합니다.
+        """
         try:
             print("🔄 기존 투자 노트 마이그레이션을 시작합니다...")
             
             # 현재 데이터 읽기
-            current_df = self.read_investment_notes()
+            current_df = notes_df if notes_df is not None else self.read_investment_notes()
             
             if current_df.empty:
                 print("📝 마이그레이션할 데이터가 없습니다.")
@@ -525,10 +541,20 @@ class InvestmentNotesManager:
             print(f"❌ 매도완료 투자 노트 조회 실패: {e}")
             return pd.DataFrame()
     
-    def get_notes_by_portfolio(self, portfolio_df: pd.DataFrame) -> pd.DataFrame:
-        """포트폴리오에 있는 종목들의 투자 노트만 조회"""
+    def split_notes_by_status(self, notes_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """이미 읽은 투자 노트를 포트폴리오_상태(보유중/관심종목/매도완료)별로 나누기"""
+        if notes_df.empty or '포트폴리오_상태' not in notes_df.columns:
+            return {status: pd.DataFrame() for status in NOTE_STATUSES}
+        return {status: notes_df[notes_df['포트폴리오_상태'] == status] for status in NOTE_STATUSES}
+    
+    def get_notes_by_portfolio(self, portfolio_df: pd.DataFrame, notes_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """포트폴리오에 있는 종목들의 투자 노트만 조회
+        
+        notes_df를 넘기면 시트를 다시 읽지 않고 그 데이터프레임에서 찾습니다.
+        """
         try:
-            notes_df = self.read_investment_notes()
+            if notes_df is None:
+                notes_df = self.read_investment_notes()
             
             if notes_df.empty:
                 return pd.DataFrame()
@@ -545,10 +571,14 @@ class InvestmentNotesManager:
             print(f"❌ 포트폴리오 투자 노트 조회 실패: {e}")
             return pd.DataFrame()
     
-    def get_missing_notes(self, portfolio_df: pd.DataFrame) -> List[str]:
-        """포트폴리오에 있지만 투자 노트가 없는 종목들"""
+    def get_missing_notes(self, portfolio_df: pd.DataFrame, notes_df: Optional[pd.DataFrame] = None) -> List[str]:
+        """포트폴리오에 있지만 투자 노트가 없는 종목들
+        
+        notes_df를 넘기면 시트를 다시 읽지 않고 그 데이터프레임에서 찾습니다.
+        """
         try:
-            notes_df = self.read_investment_notes()
+            if notes_df is None:
+                notes_df = self.read_investment_notes()
             
             if notes_df.empty:
                 return portfolio_df['종목코드'].astype(str).tolist()
@@ -589,7 +619,7 @@ def main():
         # 투자_노트 시트가 없으면 생성
         try:
             notes_df = manager.read_investment_notes()
-        except:
+        except NotesSheetNotFoundError:
             print("📝 '투자_노트' 시트가 없습니다. 새로 생성합니다.")
             manager.create_investment_notes_sheet()
             notes_df = manager.read_investment_notes()
@@ -623,8 +653,10 @@ def main():
         
     except Exception as e:
         print(f"❌ 테스트 실패: {e}")
-        import traceback
-        print(f"상세 오류: {traceback.format_exc()}")
+        # 전체 traceback은 APP_DEBUG가 설정된 경우에만 출력
+        if os.getenv('APP_DEBUG'):
+            import traceback
+            print(f"상세 오류: {traceback.format_exc()}")
 
 if __name__ == "__main__":
     main()
@@ -5,19 +5,76 @@
 
 import streamlit as st
 import os
+import pandas as pd
 from investment_note_generator import InvestmentNoteGenerator
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_secret(key):
-    """환경변수 또는 Streamlit secrets에서 값을 가져옵니다."""
+    """환경변수 또는 Streamlit secrets에서 값을 가져옵니다 (5분 동안 캐시하여 secrets 변경도 재시작 없이 반영)"""
     try:
         return st.secrets[key]
     except:
         return os.getenv(key)
 
 
+@st.cache_resource
+def get_note_generator(spreadsheet_id: str) -> InvestmentNoteGenerator:
+    """투자 노트 생성기 (Gemini 클라이언트와 시트 인증을 클릭마다 새로 만들지 않고 재사용)"""
+    return InvestmentNoteGenerator(spreadsheet_id)
+
+
+# 미리보기 "기본 정보" 표에 표시할 (항목명, 노트 컬럼) 목록
+PREVIEW_INFO_FIELDS = (
+    ('기업명', '종목명'),
+    ('종목코드', '종목코드'),
+    ('투자 확신도', '투자 확신도 (Conviction)'),
+    ('섹터/산업', '섹터/산업 (Sector/Industry)'),
+    ('투자 유형', '투자 유형 (Asset Type)'),
+    ('투자 기간', '투자 기간 (Horizon)'),
+)
+
+
+def build_preview_info_table(preview_note):
+    """미리보기 노트의 기본 정보를 항목 → 값 형태의 표로 변환합니다."""
+    return pd.DataFrame(
+        {'값': [str(preview_note.get(column, '')) for _, column in PREVIEW_INFO_FIELDS]},
+        index=pd.Index([label for label, _ in PREVIEW_INFO_FIELDS], name='항목')
+    )
+
+
+# 사용법 안내 (번호 목록을 한 번에 렌더링)
+USAGE_GUIDE = """\
+1. 기업명과 종목코드를 입력하세요
+2. 기업의 실적 발표, 전망, 주요 성과 등의 보고서 내용을 입력하세요
+3. '미리보기 생성'으로 결과를 확인한 후 '투자 노트 생성'으로 저장하세요
+4. 생성된 투자 노트는 Deep Research 질문 생성에서 활용됩니다"""
+
+# 사용법 안내에 표시할 예시 보고서
+EXAMPLE_REPORT = """삼성전자 2024년 3분기 실적 발표:
+
+매출: 67조원 (전년 동기 대비 12% 증가)
+영업이익: 10조원 (전년 동기 대비 279% 증가)
+
+주요 성과:
+- HBM3 시장 점유율 50% 이상 유지
+- AI 반도체 수요 급증으로 메모리 사업 호조
+- 파운드리 3나노 공정 수율 안정화
+- 모바일 사업 수익성 개선
+
+전망:
+- 2024년 4분기 AI 반도체 수요 지속 전망
+- HBM4 양산 준비 중
+- 파운드리 신규 고객 확보 기대"""
+
+
+@st.fragment
 def render_investment_notes_page():
-    """투자 노트 자동 생성 페이지를 렌더링합니다."""
+    """투자 노트 자동 생성 페이지를 렌더링합니다.
+
+    fragment로 감싸 페이지 안의 버튼을 눌러도 이 페이지만 다시 실행되고
+    사이드바와 계좌 로딩은 다시 실행되지 않습니다.
+    """
     
     # 페이지 헤더
     st.markdown("""
@@ -99,7 +156,7 @@ def render_investment_notes_page():
         try:
             with st.spinner("AI가 기업 보고서를 분석하여 투자 노트 미리보기를 생성하고 있습니다..."):
                 # 투자 노트 생성기 초기화
-                generator = InvestmentNoteGenerator(spreadsheet_id)
+                generator = get_note_generator(spreadsheet_id)
                 
                 # 미리보기 생성
                 preview_note = generator.preview_note(company_name, stock_code, report_content)
@@ -113,38 +170,29 @@ def render_investment_notes_page():
                     col1, col2 = st.columns(2)
                     
                     with col1:
-                        st.write("**기본 정보**")
-                        st.write(f"**기업명**: {preview_note['종목명']}")
-                        st.write(f"**종목코드**: {preview_note['종목코드']}")
-                        st.write(f"**투자 확신도**: {preview_note['투자 확신도 (Conviction)']}")
-                        st.write(f"**섹터/산업**: {preview_note['섹터/산업 (Sector/Industry)']}")
-                        st.write(f"**투자 유형**: {preview_note['투자 유형 (Asset Type)']}")
-                        st.write(f"**투자 기간**: {preview_note['투자 기간 (Horizon)']}")
+                        st.markdown("**기본 정보**")
+                        st.table(build_preview_info_table(preview_note))
                     
                     with col2:
-                        st.write("**투자 아이디어**")
-                        st.write(preview_note['투자 아이디어 (Thesis)'])
+                        st.markdown(f"**투자 아이디어**\n\n{preview_note['투자 아이디어 (Thesis)']}")
                     
                     # 상세 정보를 탭으로 구분
                     tab1, tab2, tab3, tab4 = st.tabs(["🚀 촉매", "⚠️ 리스크", "📊 모니터링 지표", "💰 목표/매도"])
                     
                     with tab1:
-                        st.write("**핵심 촉매**")
-                        st.write(preview_note['핵심 촉매 (Catalysts)'])
+                        st.markdown(f"**핵심 촉매**\n\n{preview_note['핵심 촉매 (Catalysts)']}")
                     
                     with tab2:
-                        st.write("**핵심 리스크**")
-                        st.write(preview_note['핵심 리스크 (Risks)'])
+                        st.markdown(f"**핵심 리스크**\n\n{preview_note['핵심 리스크 (Risks)']}")
                     
                     with tab3:
-                        st.write("**핵심 모니터링 지표**")
-                        st.write(preview_note['핵심 모니터링 지표 (KPIs)'])
+                        st.markdown(f"**핵심 모니터링 지표**\n\n{preview_note['핵심 모니터링 지표 (KPIs)']}")
                     
                     with tab4:
-                        st.write("**목표 주가**")
-                        st.write(preview_note['목표 주가 (Target)'])
-                        st.write("**매도 조건**")
-                        st.write(preview_note['매도 조건 (Exit Plan)'])
+                        st.markdown(
+                            f"**목표 주가**\n\n{preview_note['목표 주가 (Target)']}\n\n"
+                            f"**매도 조건**\n\n{preview_note['매도 조건 (Exit Plan)']}"
+                        )
                     
                     # 저장 확인
                     if st.button("💾 이 투자 노트를 DB에 저장", type="primary"):
@@ -166,7 +214,7 @@ def render_investment_notes_page():
         try:
             with st.spinner("AI가 기업 보고서를 분석하여 투자 노트를 생성하고 있습니다..."):
                 # 투자 노트 생성기 초기화
-                generator = InvestmentNoteGenerator(spreadsheet_id)
+                generator = get_note_generator(spreadsheet_id)
                 
                 # 투자 노트 생성 및 저장
                 success = generator.create_and_save_note(company_name, stock_code, report_content)
@@ -186,26 +234,7 @@ def render_investment_notes_page():
     if not preview_button and not generate_button:
         st.subheader("📖 사용법 안내")
         st.info("💡 사용법:")
-        st.write("1. 기업명과 종목코드를 입력하세요")
-        st.write("2. 기업의 실적 발표, 전망, 주요 성과 등의 보고서 내용을 입력하세요")
-        st.write("3. '미리보기 생성'으로 결과를 확인한 후 '투자 노트 생성'으로 저장하세요")
-        st.write("4. 생성된 투자 노트는 Deep Research 질문 생성에서 활용됩니다")
+        st.markdown(USAGE_GUIDE)
         
         st.subheader("📝 예시 보고서")
-        st.code("""
-삼성전자 2024년 3분기 실적 발표:
-
-매출: 67조원 (전년 동기 대비 12% 증가)
-영업이익: 10조원 (전년 동기 대비 279% 증가)
-
-주요 성과:
-- HBM3 시장 점유율 50% 이상 유지
-- AI 반도체 수요 급증으로 메모리 사업 호조
-- 파운드리 3나노 공정 수율 안정화
-- 모바일 사업 수익성 개선
-
-전망:
-- 2024년 4분기 AI 반도체 수요 지속 전망
-- HBM4 양산 준비 중
-- 파운드리 신규 고객 확보 기대
-        """)
+        st.code(EXAMPLE_REPORT)
@@ -36,8 +36,10 @@ def main():
             
     except Exception as e:
         print(f"❌ 마이그레이션 실패: {e}")
-        import traceback
-        print(f"상세 오류: {traceback.format_exc()}")
+        # 전체 traceback은 APP_DEBUG가 설정된 경우에만 출력
+        if os.getenv('APP_DEBUG'):
+            import traceback
+            print(f"상세 오류: {traceback.format_exc()}")
 
 if __name__ == "__main__":
     main()
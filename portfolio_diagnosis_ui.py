@@ -7,6 +7,7 @@ import streamlit as st
 from portfolio_diagnosis_generator import PortfolioDiagnosisGenerator
 
 
+@st.fragment
 def render_portfolio_diagnosis_page():
     """포트폴리오 정밀 진단기 페이지 렌더링"""
     
@@ -1,17 +1,36 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from google.oauth2 import service_account
 from googleapiclient.discovery import build  # pyright: ignore[reportMissingImports]
+from google_clients import get_credentials, execute_with_retry, SPREADSHEETS_SCOPE
 from dotenv import load_dotenv
 import time
+import hashlib
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Optional, List, Dict
 
 load_dotenv()
 
+# 프로세스 간 파일 잠금 (Windows 등 fcntl이 없는 환경에서는 잠금 없이 동작)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# 한국투자증권 조회 API를 재시도할 HTTP 상태 코드
+KIS_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 한국투자증권 접근 토큰 캐시 위치 (재시작 후에도 유효한 토큰 재사용)
+TOKEN_CACHE_DIR = os.getenv('KIS_TOKEN_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'portfolio-manager'))
+
 @dataclass
 class RequestHeader:
     authorization: str
@@ -161,18 +180,45 @@ class KoreaInvestmentAPI:
     
     def __init__(self):
         self.base_url = "https://openapi.koreainvestment.com:9443"
+        # 모든 API 호출이 연결(TLS 포함)을 재사용하도록 세션 하나를 공유
+        # 조회(GET) 요청은 요청 제한/일시적 서버 오류 시 백오프 후 재시도 (토큰 발급 POST는 별도 재시도 로직 사용)
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=KIS_RETRY_STATUS_CODES, raise_on_status=False)
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry))
         self.access_tokens = {}
         self.token_expiry = {}
+        self.token_locks = {}
         self.exchange_rate = None
         self.exchange_rate_source = None
     
     def get_access_token(self, account: Account) -> str:
-        """접근 토큰 발급 (계좌별로 관리)"""
+        """접근 토큰 발급 (앱키별로 관리하며, 같은 앱키로 동시에 발급 요청하지 않음)"""
+        token_key = account.api_key
+        
         # 토큰이 유효한 경우 재사용
-        if (account.name in self.access_tokens and 
-            account.name in self.token_expiry and 
-            datetime.now() < self.token_expiry[account.name]):
-            return self.access_tokens[account.name]
+        if token_key in self.token_expiry and datetime.now() < self.token_expiry[token_key]:
+            return self.access_tokens[token_key]
+        
+        with self.token_locks.setdefault(token_key, threading.Lock()):
+            # 대기하는 동안 다른 스레드가 발급했으면 재사용
+            if token_key in self.token_expiry and datetime.now() < self.token_expiry[token_key]:
+                return self.access_tokens[token_key]
+            
+            # 다른 프로세스와 동시에 발급하지 않도록 토큰 캐시 파일을 잠근 상태에서 확인/발급
+            with self._token_file_lock(token_key):
+                cached = self._load_cached_token(token_key)
+                if cached:
+                    self.access_tokens[token_key], self.token_expiry[token_key] = cached
+                    print(f"♻️ {account.name} 계좌 접근 토큰을 캐시에서 불러왔습니다.")
+                    return self.access_tokens[token_key]
+                
+                access_token = self._issue_access_token(account)
+                self._save_cached_token(token_key, access_token, self.token_expiry[token_key])
+                return access_token
+    
+    def _issue_access_token(self, account: Account) -> str:
+        """한국투자증권 OAuth 접근 토큰 새로 발급"""
+        token_key = account.api_key
         
         # 토큰 발급 제한 방지를 위한 재시도 로직
         max_retries = 3
@@ -185,15 +231,15 @@ class KoreaInvestmentAPI:
                     "appsecret": account.api_secret
                 }
                 url = f"{self.base_url}/oauth2/tokenP"
-                response = requests.post(url, headers=headers, data=json.dumps(body))
+                response = self.session.post(url, headers=headers, data=json.dumps(body))
                 
                 if response.status_code == 200:
                     token_data = response.json()
-                    self.access_tokens[account.name] = token_data["access_token"]
+                    self.access_tokens[token_key] = token_data["access_token"]
                     # 토큰 만료 시간 설정 (23시간 후)
-                    self.token_expiry[account.name] = datetime.now() + timedelta(hours=23)
+                    self.token_expiry[token_key] = datetime.now() + timedelta(hours=23)
                     print(f"✅ {account.name} 계좌 접근 토큰이 발급되었습니다.")
-                    return self.access_tokens[account.name]
+                    return self.access_tokens[token_key]
                 else:
                     print(f"⚠️ {account.name} 계좌 토큰 발급 실패: {response.text}")
                     if attempt < max_retries - 1:
@@ -208,6 +254,65 @@ class KoreaInvestmentAPI:
         
         raise Exception(f"{account.name} 계좌 토큰 발급 실패")
     
+    @staticmethod
+    def _token_cache_path(token_key: str) -> str:
+        """앱키별 토큰 캐시 파일 경로 (파일 이름에는 앱키 해시만 사용)"""
+        key_hash = hashlib.sha256(token_key.encode('utf-8')).hexdigest()
+        return os.path.join(TOKEN_CACHE_DIR, f"kis_token_{key_hash[:16]}.json")
+    
+    @contextmanager
+    def _token_file_lock(self, token_key: str):
+        """토큰 캐시 파일용 프로세스 간 잠금 (fcntl을 쓸 수 없으면 잠금 없이 진행)"""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        
+        try:
+            os.makedirs(TOKEN_CACHE_DIR, mode=0o700, exist_ok=True)
+            lock_file = open(self._token_cache_path(token_key) + '.lock', 'w')
+        except OSError:
+            yield
+            return
+        
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _load_cached_token(self, token_key: str) -> Optional[tuple]:
+        """디스크에 저장된 토큰이 같은 앱키로 발급되었고 아직 유효하면 (토큰, 만료시각) 반환"""
+        try:
+            with open(self._token_cache_path(token_key), encoding='utf-8') as f:
+                cached = json.load(f)
+            key_hash = hashlib.sha256(token_key.encode('utf-8')).hexdigest()
+            expires_at = datetime.fromisoformat(cached['expires_at'])
+            if cached.get('api_key_hash') != key_hash or datetime.now() >= expires_at:
+                return None
+            return cached['token'], expires_at
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def _save_cached_token(self, token_key: str, access_token: str, expires_at: datetime):
+        """발급받은 토큰을 디스크에 저장 (본인만 읽을 수 있는 파일로 원자적으로 교체)"""
+        path = self._token_cache_path(token_key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        cached = {
+            'token': access_token,
+            'expires_at': expires_at.isoformat(),
+            'issued_at': datetime.now().isoformat(),
+            'api_key_hash': hashlib.sha256(token_key.encode('utf-8')).hexdigest()
+        }
+        try:
+            os.makedirs(TOKEN_CACHE_DIR, mode=0o700, exist_ok=True)
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cached, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ 접근 토큰 캐시 저장 실패: {e}")
+    
     def get_domestic_cash(self, account: Account) -> float:
         """국내 주식 계좌 현금 잔고 조회 (원화)"""
         try:
@@ -237,7 +342,7 @@ class KoreaInvestmentAPI:
             
             print(f"🔍 {account.name} 계좌 현금 잔고 조회 중...")
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -282,7 +387,7 @@ class KoreaInvestmentAPI:
             
             print(f"🔍 {account.name} 계좌 현금 잔고 조회 중...")
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -344,7 +449,7 @@ class KoreaInvestmentAPI:
             print(f"🔍 API 요청 URL: {url}")
             print(f"🔍 API 요청 파라미터: {params}")
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params)
             print(f"🔍 API 응답: {response.text}")
             
             if response.status_code == 200:
@@ -425,7 +530,7 @@ class KoreaInvestmentAPI:
             print(f"🔍 API 요청 URL: {url}")
             print(f"🔍 API 요청 파라미터: {params}")
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params)
             print(f"🔍 해외 주식 API 응답: {response.text}")
             
             if response.status_code == 200:
@@ -482,6 +587,8 @@ class KoreaInvestmentAPI:
 class GoogleSheetsManager:
     """구글 스프레드시트 관리 클래스"""
     
+    EXCHANGE_RATE_SHEET = '환율정보'
+    
     def __init__(self):
         self.spreadsheet_id = os.getenv('GOOGLE_SPREADSHEET_ID')
         self.credentials = None
@@ -491,27 +598,11 @@ class GoogleSheetsManager:
     def _authenticate(self):
         """구글 API 인증"""
         try:
-            # 환경변수에서 서비스 계정 JSON 읽기 시도
-            service_account_json = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
-            
-            if service_account_json:
-                # 환경변수에서 JSON 문자열을 파싱
-                import json
-                service_account_info = json.loads(service_account_json)
-                credentials = service_account.Credentials.from_service_account_info(
-                    service_account_info,
-                    scopes=['https://www.googleapis.com/auth/spreadsheets']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (환경변수에서 JSON)")
-            else:
-                # 파일에서 읽기 시도
-                credentials = service_account.Credentials.from_service_account_file(
-                    'service-account-key.json',
-                    scopes=['https://www.googleapis.com/auth/spreadsheets']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (파일에서 JSON)")
-            
-            self.service = build('sheets', 'v4', credentials=credentials)
+            # 서비스 계정 JSON은 프로세스당 한 번만 파싱 (google_clients 캐시 재사용)
+            credentials = get_credentials((SPREADSHEETS_SCOPE,))
+            
+            # 패키지에 포함된 디스커버리 문서 사용 (HTTP 다운로드와 파일 캐시 생략)
+            self.service = build('sheets', 'v4', credentials=credentials, cache_discovery=False, static_discovery=True)
         except Exception as e:
             print(f"❌ 구글 API 인증 실패: {e}")
             print("💡 GOOGLE_APPLICATION_CREDENTIALS_JSON 환경변수를 설정하거나 service-account-key.json 파일을 확인하세요.")
@@ -520,17 +611,25 @@ class GoogleSheetsManager:
     def get_sheet_names(self):
         """스프레드시트의 시트 이름 목록 가져오기"""
         try:
-            spreadsheet = self.service.spreadsheets().get(
+            spreadsheet = execute_with_retry(self.service.spreadsheets().get(
                 spreadsheetId=self.spreadsheet_id
-            ).execute()
+            ))
             return [sheet['properties']['title'] for sheet in spreadsheet['sheets']]
         except Exception as e:
             print(f"❌ 시트 목록 조회 실패: {e}")
             return []
     
-    def update_portfolio(self, portfolio_data: List[Dict], total_cash: float, exchange_rate: float = None, exchange_source: str = None):
-        """포트폴리오 데이터를 스프레드시트에 업데이트"""
+    def update_portfolio(self, portfolio_data, total_cash: float, exchange_rate: float = None, exchange_source: str = None):
+        """
+        포트폴리오 데이터를 스프레드시트에 업데이트
+        
+        Args:
+            portfolio_data (pd.DataFrame | List[Dict]): 종목별 포트폴리오 데이터 (전달받은 데이터는 수정하지 않음)
+        """
         try:
+            # 데이터프레임 생성
+            df = portfolio_data if isinstance(portfolio_data, pd.DataFrame) else pd.DataFrame(portfolio_data)
+            
             # 현금 항목 추가
             if total_cash > 0:
                 cash_item = {
@@ -546,22 +645,22 @@ class GoogleSheetsManager:
                     "계좌구분": "통합",
                     "통화": "KRW"
                 }
-                portfolio_data.append(cash_item)
+                df = pd.concat([df, pd.DataFrame([cash_item])], ignore_index=True)
             
-            if not portfolio_data:
+            if df.empty:
                 print("❌ 업데이트할 포트폴리오 데이터가 없습니다.")
                 return
             
-            # 데이터프레임 생성
-            df = pd.DataFrame(portfolio_data)
-            
             # 전체 포트폴리오 가치 계산 (모든 금액이 원화로 통일됨)
-            total_value = df['평가금액'].sum()
-            df['비중'] = (df['평가금액'] / total_value * 100).round(2)
+            values = df['평가금액'].to_numpy(dtype=float)
+            total_value = values.sum()
+            # assign으로 새 데이터프레임을 만들어 전달받은 portfolio_data에 비중 열이 추가되지 않도록 함
+            df = df.assign(비중=np.round(values * (100.0 / total_value), 2))
             
             # 계좌별 비중 계산 (현금 제외)
             stock_df = df[df['종목코드'] != 'CASH']
-            account_weights = stock_df.groupby('계좌구분')['평가금액'].sum() / total_value * 100
+            account_values = stock_df.groupby('계좌구분')['평가금액'].sum()
+            account_weights = account_values / total_value * 100
             
             # 현금 비중 계산
             cash_weight = (total_cash / total_value * 100) if total_value > 0 else 0
@@ -569,16 +668,13 @@ class GoogleSheetsManager:
             # 헤더 행 추가 (통화 정보 포함)
             headers = [['종목코드', '종목명', '보유수량', '매입평균가', '매입금액(원)', '현재가', '평가금액(원)', '평가손익(원)', '수익률', '계좌구분', '비중', '통화']]
             
-            # 데이터 행들
-            data_rows = []
-            for _, row in df.iterrows():
-                data_row = [
-                    row['종목코드'], row['종목명'], row['보유수량'], 
-                    row['매입평균가'], row['매입금액'], row['현재가'], 
-                    row['평가금액'], row['평가손익'], row['수익률'], 
-                    row['계좌구분'], row['비중'], row['통화']
-                ]
-                data_rows.append(data_row)
+            # 데이터 행들 (열 단위로 골라 한 번에 리스트로 변환)
+            data_rows = df[[
+                '종목코드', '종목명', '보유수량',
+                '매입평균가', '매입금액', '현재가',
+                '평가금액', '평가손익', '수익률',
+                '계좌구분', '비중', '통화'
+            ]].values.tolist()
             
             # 전체 데이터
             all_data = headers + data_rows
@@ -599,30 +695,37 @@ class GoogleSheetsManager:
                 return
             
             try:
+                # 기록할 범위를 모아 한 번의 요청으로 삭제하고 한 번의 요청으로 입력
+                value_ranges = [{'range': range_name, 'values': all_data}]
+                
+                # 환율 정보를 별도 시트에 저장
+                exchange_range = None
+                if exchange_rate and exchange_source:
+                    exchange_range = self._prepare_exchange_rate_range(exchange_rate, exchange_source, total_value, sheet_names)
+                    if exchange_range:
+                        value_ranges.append(exchange_range)
+                
                 # 기존 데이터 삭제
-                self.service.spreadsheets().values().clear(
+                execute_with_retry(self.service.spreadsheets().values().batchClear(
                     spreadsheetId=self.spreadsheet_id,
-                    range=range_name
-                ).execute()
+                    body={'ranges': [value_range['range'] for value_range in value_ranges]}
+                ))
                 
                 # 새 데이터 입력
-                self.service.spreadsheets().values().update(
+                execute_with_retry(self.service.spreadsheets().values().batchUpdate(
                     spreadsheetId=self.spreadsheet_id,
-                    range=range_name,
-                    valueInputOption='RAW',
-                    body={'values': all_data}
-                ).execute()
+                    body={'valueInputOption': 'RAW', 'data': value_ranges}
+                ))
                 
-                # 환율 정보를 별도 시트에 저장
-                if exchange_rate and exchange_source:
-                    self._update_exchange_rate_info(exchange_rate, exchange_source, total_value)
+                if exchange_range:
+                    print(f"✅ 환율 정보가 '{self.EXCHANGE_RATE_SHEET}' 시트에 저장되었습니다.")
                 
                 print(f"✅ 포트폴리오 데이터가 구글 스프레드시트에 업데이트되었습니다.")
                 print(f"💰 총 포트폴리오 가치: {total_value:,.0f}원")
                 print(f"💰 현금 비중: {cash_weight:.2f}% ({total_cash:,.0f}원)")
                 print(f"📊 계좌별 비중:")
                 for account, weight in account_weights.items():
-                    account_value = stock_df[stock_df['계좌구분'] == account]['평가금액'].sum()
+                    account_value = account_values[account]
                     print(f"  - {account}: {weight:.2f}% ({account_value:,.0f}원)")
                     
             except Exception as e:
@@ -632,29 +735,24 @@ class GoogleSheetsManager:
         except Exception as e:
             print(f"❌ 스프레드시트 업데이트 실패: {e}")
     
-    def _update_exchange_rate_info(self, exchange_rate: float, exchange_source: str, total_value: float):
-        """환율 정보를 별도 시트에 저장"""
+    def _prepare_exchange_rate_range(self, exchange_rate: float, exchange_source: str, total_value: float, sheet_names: List[str]) -> Optional[Dict]:
+        """환율 정보 시트를 준비하고 기록할 범위와 데이터를 반환 (실패 시 None)"""
         try:
-            # 환율 정보 시트 생성 또는 업데이트
-            sheet_name = '환율정보'
-            
-            # 시트가 있는지 확인
-            sheet_names = self.get_sheet_names()
-            if sheet_name not in sheet_names:
-                # 새 시트 생성
-                self.service.spreadsheets().batchUpdate(
+            # 시트가 없으면 새로 생성
+            if self.EXCHANGE_RATE_SHEET not in sheet_names:
+                execute_with_retry(self.service.spreadsheets().batchUpdate(
                     spreadsheetId=self.spreadsheet_id,
                     body={
                         'requests': [{
                             'addSheet': {
                                 'properties': {
-                                    'title': sheet_name
+                                    'title': self.EXCHANGE_RATE_SHEET
                                 }
                             }
                         }]
                     }
-                ).execute()
-                print(f"✅ '{sheet_name}' 시트가 생성되었습니다.")
+                ))
+                print(f"✅ '{self.EXCHANGE_RATE_SHEET}' 시트가 생성되었습니다.")
             
             # 환율 정보 데이터 준비
             now = datetime.now()
@@ -663,24 +761,11 @@ class GoogleSheetsManager:
                 [now.strftime('%Y-%m-%d %H:%M:%S'), f"{exchange_rate:,.2f}원", exchange_source, f"{total_value:,.0f}원"]
             ]
             
-            # 환율 정보 업데이트
-            range_name = f'{sheet_name}!A1:D10'
-            self.service.spreadsheets().values().clear(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            ).execute()
-            
-            self.service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption='RAW',
-                body={'values': exchange_data}
-            ).execute()
-            
-            print(f"✅ 환율 정보가 '{sheet_name}' 시트에 저장되었습니다.")
+            return {'range': f'{self.EXCHANGE_RATE_SHEET}!A1:D10', 'values': exchange_data}
             
         except Exception as e:
             print(f"⚠️ 환율 정보 저장 실패: {e}")
+            return None
 
 def main():
     """메인 함수"""
@@ -1,45 +1,37 @@
 import os
-import json
+import re
+import hashlib
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from google import genai
+from google_clients import get_sheets_service, execute_with_retry, generate_content_with_retry, SPREADSHEETS_SCOPE
 import uuid
 
 class ReportArchiveManager:
     """딥리서치 보고서 아카이브 관리자"""
     
-    def __init__(self, spreadsheet_id: str, gemini_api_key: str = None):
+    def __init__(self, spreadsheet_id: str, gemini_api_key: str = None, archive_threshold: int = 600):
         self.spreadsheet_id = spreadsheet_id
         self.gemini_api_key = gemini_api_key or os.getenv('GOOGLE_API_KEY')
         self.service = None
         self.client = None
         self.sheet_name = "보고서_아카이브"
+        # 이 길이(글자 수)보다 짧은 보고서는 Gemini 호출 없이 원문을 요약으로 사용
+        self.archive_threshold = archive_threshold
+        self._stock_pattern = None
+        self._stock_names = {}
+        self._known_hashes = None  # 콘텐츠 해시 -> 시트 행 번호
+        self._hash_header_checked = False  # 기존 시트의 콘텐츠_해시 헤더 확인 여부
+        self._last_row = None  # 마지막 데이터 행 번호 (헤더 = 1행)
+        self._headers = None
         self._authenticate_google()
         self._setup_gemini()
     
     def _authenticate_google(self):
-        """구글 API 인증"""
+        """구글 API 인증 (공용 Sheets 서비스 재사용)"""
         try:
-            # 환경변수에서 서비스 계정 JSON 읽기 시도
-            service_account_json_str = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
-            if service_account_json_str:
-                service_account_info = json.loads(service_account_json_str)
-                credentials = service_account.Credentials.from_service_account_info(
-                    service_account_info,
-                    scopes=['https://www.googleapis.com/auth/spreadsheets']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (환경변수에서 JSON)")
-            else:
-                # 파일에서 JSON 읽기 시도
-                credentials = service_account.Credentials.from_service_account_file(
-                    'service-account-key.json',
-                    scopes=['https://www.googleapis.com/auth/spreadsheets']
-                )
-                print("✅ 구글 API 인증이 완료되었습니다. (파일에서 JSON)")
-            
-            self.service = build('sheets', 'v4', credentials=credentials)
+            self.service = get_sheets_service((SPREADSHEETS_SCOPE,))
         except Exception as e:
             print(f"❌ 구글 API 인증 실패: {e}")
             raise
@@ -61,14 +53,15 @@ class ReportArchiveManager:
         """보고서 아카이브 시트 생성"""
         try:
             # 시트가 이미 존재하는지 확인
-            spreadsheet = self.service.spreadsheets().get(
+            spreadsheet = execute_with_retry(self.service.spreadsheets().get(
                 spreadsheetId=self.spreadsheet_id
-            ).execute()
+            ))
             
             existing_sheets = [sheet['properties']['title'] for sheet in spreadsheet.get('sheets', [])]
             
             if self.sheet_name in existing_sheets:
                 print(f"✅ '{self.sheet_name}' 시트가 이미 존재합니다.")
+                self._ensure_hash_header()
                 return True
             
             # 새 시트 생성
@@ -79,27 +72,28 @@ class ReportArchiveManager:
                             'title': self.sheet_name,
                             'gridProperties': {
                                 'rowCount': 1000,
-                                'columnCount': 6
+                                'columnCount': 7
                             }
                         }
                     }
                 }]
             }
             
-            self.service.spreadsheets().batchUpdate(
+            execute_with_retry(self.service.spreadsheets().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
                 body=request_body
-            ).execute()
+            ))
             
             # 헤더 추가
-            headers = ['보고서_ID', '생성일', '관련_종목', '사용된_프롬프트', '보고서_요약', '보고서_원문']
-            self.service.spreadsheets().values().update(
+            headers = ['보고서_ID', '생성일', '관련_종목', '사용된_프롬프트', '보고서_요약', '보고서_원문', '콘텐츠_해시']
+            execute_with_retry(self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
-                range=f'{self.sheet_name}!A1:F1',
+                range=f'{self.sheet_name}!A1:G1',
                 valueInputOption='RAW',
                 body={'values': [headers]}
-            ).execute()
+            ))
             
+            self._hash_header_checked = True
             print(f"✅ '{self.sheet_name}' 시트가 생성되었습니다.")
             return True
             
@@ -107,6 +101,25 @@ class ReportArchiveManager:
             print(f"❌ 시트 생성 실패: {e}")
             return False
     
+    def _ensure_hash_header(self):
+        """콘텐츠_해시 열이 없던 기존 시트에 헤더만 추가 (인스턴스당 1회만 확인, 이전 보고서는 해시 없음)"""
+        if self._hash_header_checked:
+            return
+        
+        result = execute_with_retry(self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{self.sheet_name}!G1'
+        ))
+        values = result.get('values', [])
+        if not values or not values[0] or values[0][0] != '콘텐츠_해시':
+            execute_with_retry(self.service.spreadsheets().values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{self.sheet_name}!G1',
+                valueInputOption='RAW',
+                body={'values': [['콘텐츠_해시']]}
+            ))
+        self._hash_header_checked = True
+    
     def generate_report_id(self) -> str:
         """보고서 ID 생성 (날짜 + UUID)"""
         today = datetime.now().strftime('%Y%m%d')
@@ -132,10 +145,7 @@ class ReportArchiveManager:
 - 간결하고 명확한 문장으로 작성"""
             
             print("🤖 Gemini API로 보고서 요약 생성 중...")
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=summary_prompt
-            )
+            response = generate_content_with_retry(self.client, self.model_name, summary_prompt)
             
             if response.text:
                 print("✅ 보고서 요약 생성 완료")
@@ -168,10 +178,7 @@ class ReportArchiveManager:
 예시: 삼성전자, SK하이닉스, Apple, Microsoft"""
             
             print("🤖 Gemini API로 관련 종목 추출 중...")
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=extract_prompt
-            )
+            response = generate_content_with_retry(self.client, self.model_name, extract_prompt)
             
             if response.text:
                 print("✅ 관련 종목 추출 완료")
@@ -183,19 +190,131 @@ class ReportArchiveManager:
             print(f"❌ 관련 종목 추출 실패: {e}")
             return "일반적 분석"
     
+    @staticmethod
+    def _name_to_regex(name: str) -> str:
+        """종목명 정규식 (영문/숫자로 시작하거나 끝나면 단어 중간에서 매칭되지 않도록 경계 추가)"""
+        regex = re.escape(name)
+        if re.match(r'[A-Za-z0-9]', name):
+            regex = r'(?<![A-Za-z0-9])' + regex
+        if re.search(r'[A-Za-z0-9]$', name):
+            regex = regex + r'(?![A-Za-z0-9])'
+        return regex
+    
+    def _get_stock_pattern(self):
+        """투자_노트의 종목명으로 만든 정규식 (최초 1회만 시트에서 읽음)"""
+        if self._stock_pattern is not None:
+            return self._stock_pattern
+        
+        names = []
+        try:
+            result = execute_with_retry(self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range='투자_노트!B2:B'
+            ))
+            names = [row[0].strip() for row in result.get('values', []) if row and row[0].strip()]
+        except Exception as e:
+            print(f"⚠️ 투자_노트 종목 목록 읽기 실패: {e}")
+        
+        if names:
+            # 대소문자를 무시하고 매칭한 뒤 시트에 등록된 종목명으로 표시
+            self._stock_names = {name.lower(): name for name in names}
+            # 긴 이름이 먼저 매칭되도록 정렬 (예: 'SK하이닉스' > 'SK')
+            alternation = '|'.join(self._name_to_regex(name) for name in sorted(set(names), key=len, reverse=True))
+            self._stock_pattern = re.compile(alternation, re.IGNORECASE)
+        else:
+            self._stock_pattern = False
+        return self._stock_pattern
+    
+    def _regex_scan_tickers(self, report_content: str) -> str:
+        """투자_노트에 등록된 종목명을 보고서에서 찾아 관련 종목 추출 (API 호출 없음)"""
+        pattern = self._get_stock_pattern()
+        if not pattern:
+            return "일반적 분석"
+        
+        found = []
+        for match in pattern.finditer(report_content):
+            name = self._stock_names.get(match.group(0).lower(), match.group(0))
+            if name not in found:
+                found.append(name)
+                if len(found) == 5:  # 최대 5개 종목까지만 추출
+                    break
+        
+        return ', '.join(found) if found else "일반적 분석"
+    
+    @staticmethod
+    def compute_content_hash(report_content: str) -> str:
+        """보고서 원문의 콘텐츠 해시 (중복 저장 확인용)"""
+        return hashlib.blake2b(report_content.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _load_known_hashes(self) -> dict:
+        """저장된 보고서의 콘텐츠 해시 목록 (최초 1회 G열만 읽음)"""
+        if self._known_hashes is not None:
+            return self._known_hashes
+        
+        result = execute_with_retry(self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{self.sheet_name}!G:G'
+        ))
+        values = result.get('values', [])
+        
+        # 1행은 헤더 (콘텐츠_해시 열이 없던 기존 보고서는 해시가 비어 있어 건너뜀)
+        self._known_hashes = {
+            row[0]: row_number
+            for row_number, row in enumerate(values[1:], start=2)
+            if row and row[0]
+        }
+        return self._known_hashes
+    
+    def _get_archived_report(self, row_number: int) -> dict:
+        """시트의 특정 행에 저장된 보고서 정보 조회"""
+        result = execute_with_retry(self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{self.sheet_name}!A{row_number}:E{row_number}'
+        ))
+        row = (result.get('values', [[]]) or [[]])[0]
+        row = row + [''] * (5 - len(row))
+        return {
+            'report_id': row[0],
+            'creation_date': row[1],
+            'related_stocks': row[2],
+            'summary': row[4],
+        }
+    
     def save_report(self, report_content: str, used_prompt: str = "") -> dict:
         """보고서를 아카이브에 저장"""
         try:
             # 시트 생성 확인
             self.create_archive_sheet()
             
+            # 이미 저장된 보고서인지 확인 (중복이면 Gemini 호출과 저장을 생략)
+            content_hash = self.compute_content_hash(report_content)
+            known_hashes = self._load_known_hashes()
+            if content_hash in known_hashes:
+                archived = self._get_archived_report(known_hashes[content_hash])
+                print(f"ℹ️ 이미 저장된 보고서입니다. ID: {archived['report_id']}")
+                return {
+                    'success': True,
+                    'duplicate': True,
+                    **archived,
+                    'message': f"이미 저장된 보고서입니다. (ID: {archived['report_id']})"
+                }
+            
             # 보고서 ID 생성
             report_id = self.generate_report_id()
             creation_date = datetime.now().strftime('%Y-%m-%d')
             
-            # 요약 및 관련 종목 생성
-            summary = self.generate_summary(report_content)
-            related_stocks = self.extract_related_stocks(report_content)
+            # 요약 및 관련 종목 생성 (짧은 보고서는 Gemini 호출 생략)
+            if len(report_content) < self.archive_threshold:
+                print("ℹ️ 짧은 보고서이므로 원문을 요약으로 사용합니다.")
+                summary = report_content.strip()
+                related_stocks = self._regex_scan_tickers(report_content)
+            else:
+                # 서로 독립적인 두 Gemini 호출을 동시에 실행 (대기 시간 = 둘 중 긴 쪽)
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    summary_future = executor.submit(self.generate_summary, report_content)
+                    stocks_future = executor.submit(self.extract_related_stocks, report_content)
+                    summary = summary_future.result()
+                    related_stocks = stocks_future.result()
             
             # 데이터 준비
             report_data = [
@@ -204,17 +323,27 @@ class ReportArchiveManager:
                 related_stocks,
                 used_prompt[:500] if used_prompt else "",  # 프롬프트는 500자로 제한
                 summary,
-                report_content
+                report_content,
+                content_hash
             ]
             
             # 시트에 데이터 추가
-            self.service.spreadsheets().values().append(
+            append_result = execute_with_retry(self.service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id,
-                range=f'{self.sheet_name}!A:F',
+                range=f'{self.sheet_name}!A:G',
                 valueInputOption='RAW',
                 insertDataOption='INSERT_ROWS',
                 body={'values': [report_data]}
-            ).execute()
+            ))
+            
+            # 추가된 행 번호를 해시 목록에 기록 (예: '보고서_아카이브'!A12:G12)
+            updated_range = append_result.get('updates', {}).get('updatedRange', '')
+            row_match = re.search(r'(\d+):', updated_range)
+            if row_match:
+                known_hashes[content_hash] = int(row_match.group(1))
+                self._last_row = int(row_match.group(1))
+            else:
+                self._last_row = None
             
             print(f"✅ 보고서가 저장되었습니다. ID: {report_id}")
             
@@ -235,61 +364,80 @@ class ReportArchiveManager:
                 'message': f"보고서 저장 중 오류가 발생했습니다: {str(e)}"
             }
     
-    def get_recent_reports(self, limit: int = 10) -> pd.DataFrame:
-        """최근 보고서 목록 조회"""
-        try:
-            result = self.service.spreadsheets().values().get(
+    @staticmethod
+    def _rows_to_dicts(headers: list, rows: list) -> list[dict]:
+        """시트 행 목록을 헤더 기준의 dict 목록으로 변환 (비어 있는 뒤쪽 셀은 빈 문자열로 채움)"""
+        width = len(headers)
+        return [dict(zip(headers, row + [''] * (width - len(row)))) for row in rows]
+    
+    @staticmethod
+    def to_df(reports: list[dict]):
+        """보고서 dict 목록을 DataFrame으로 변환 (DataFrame이 필요한 경우에만 사용)"""
+        return pd.DataFrame(reports)
+    
+    def _get_last_row(self) -> int:
+        """마지막 데이터 행 번호 (최초 1회 A열만 읽어 계산)"""
+        if self._last_row is None:
+            result = execute_with_retry(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=f'{self.sheet_name}!A:F'
-            ).execute()
-            
-            values = result.get('values', [])
-            if len(values) <= 1:  # 헤더만 있는 경우
-                return pd.DataFrame()
-            
-            # 헤더와 데이터 분리
-            headers = values[0]
-            data = values[1:]
+                range=f'{self.sheet_name}!A:A'
+            ))
+            self._last_row = len(result.get('values', []))
+        return self._last_row
+    
+    def get_recent_reports(self, limit: int = 10) -> list[dict]:
+        """최근 보고서 목록 조회 (최근 limit개 행만 시트에서 읽음)"""
+        try:
+            last_row = self._get_last_row()
+            if last_row <= 1:  # 헤더만 있는 경우
+                return []
             
-            # DataFrame 생성
-            df = pd.DataFrame(data, columns=headers)
+            start_row = max(2, last_row - limit + 1)
+            data_range = f'{self.sheet_name}!A{start_row}:F{last_row}'
             
-            # 최근 순으로 정렬
-            df = df.tail(limit)
+            if self._headers is None:
+                # 헤더와 데이터를 한 번의 요청으로 조회
+                result = execute_with_retry(self.service.spreadsheets().values().batchGet(
+                    spreadsheetId=self.spreadsheet_id,
+                    ranges=[f'{self.sheet_name}!A1:F1', data_range]
+                ))
+                header_range, body_range = result.get('valueRanges', [{}, {}])
+                self._headers = (header_range.get('values') or [[]])[0]
+                data = body_range.get('values', [])
+            else:
+                result = execute_with_retry(self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=data_range
+                ))
+                data = result.get('values', [])
             
-            return df
+            return self._rows_to_dicts(self._headers, data)
             
         except Exception as e:
             print(f"❌ 보고서 목록 조회 실패: {e}")
-            return pd.DataFrame()
+            return []
     
-    def search_reports(self, keyword: str) -> pd.DataFrame:
+    def search_reports(self, keyword: str) -> list[dict]:
         """키워드로 보고서 검색"""
         try:
-            result = self.service.spreadsheets().values().get(
+            result = execute_with_retry(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{self.sheet_name}!A:F'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             if len(values) <= 1:
-                return pd.DataFrame()
+                return []
             
             headers = values[0]
             data = values[1:]
             
-            # 키워드가 포함된 행 필터링
-            filtered_data = []
-            for row in data:
-                if any(keyword.lower() in str(cell).lower() for cell in row):
-                    filtered_data.append(row)
-            
-            if not filtered_data:
-                return pd.DataFrame()
+            # 키워드가 포함된 행 필터링 (행을 하나의 문자열로 합쳐 한 번만 비교)
+            keyword_folded = keyword.casefold()
+            filtered_data = [row for row in data if keyword_folded in '\x1f'.join(row).casefold()]
             
-            df = pd.DataFrame(filtered_data, columns=headers)
-            return df
+            return self._rows_to_dicts(headers, filtered_data)
             
         except Exception as e:
             print(f"❌ 보고서 검색 실패: {e}")
-            return pd.DataFrame()
+            return []
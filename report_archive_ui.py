@@ -8,14 +8,16 @@ import os
 from report_archive_manager import ReportArchiveManager
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_secret(key):
-    """환경변수 또는 Streamlit secrets에서 값을 가져옵니다."""
+    """환경변수 또는 Streamlit secrets에서 값을 가져옵니다 (5분 동안 캐시하여 secrets 변경도 재시작 없이 반영)"""
     try:
         return st.secrets[key]
     except:
         return os.getenv(key)
 
 
+@st.fragment
 def render_report_archive_page():
     """보고서 아카이브 페이지를 렌더링합니다."""
     
@@ -126,15 +128,15 @@ def render_report_archive_page():
             
             try:
                 with st.spinner("📋 보고서 목록을 불러오고 있습니다..."):
-                    reports_df = archive_manager.get_recent_reports(20)
+                    reports = archive_manager.get_recent_reports(20)
                     
-                    if reports_df.empty:
+                    if not reports:
                         st.info("📭 저장된 보고서가 없습니다.")
                     else:
-                        st.success(f"📊 총 {len(reports_df)}개의 보고서가 있습니다.")
+                        st.success(f"📊 총 {len(reports)}개의 보고서가 있습니다.")
                         
                         # 보고서 목록 표시
-                        for idx, row in reports_df.iterrows():
+                        for row in reports:
                             with st.expander(f"📄 {row['보고서_ID']} - {row['생성일']} ({row['관련_종목']})"):
                                 col1, col2 = st.columns([2, 1])
                                 
@@ -176,13 +178,13 @@ def render_report_archive_page():
                         with st.spinner("🔍 보고서를 검색하고 있습니다..."):
                             search_results = archive_manager.search_reports(search_keyword)
                             
-                            if search_results.empty:
+                            if not search_results:
                                 st.info(f"📭 '{search_keyword}'와 관련된 보고서를 찾을 수 없습니다.")
                             else:
                                 st.success(f"📊 '{search_keyword}' 관련 보고서 {len(search_results)}개를 찾았습니다.")
                                 
                                 # 검색 결과 표시
-                                for idx, row in search_results.iterrows():
+                                for row in search_results:
                                     with st.expander(f"📄 {row['보고서_ID']} - {row['생성일']} ({row['관련_종목']})"):
                                         col1, col2 = st.columns([2, 1])
                                         
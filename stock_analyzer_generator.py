@@ -4,113 +4,67 @@
 """
 
 import os
-import json
-import pandas as pd
-from datetime import datetime
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import time
+import string
+import functools
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+import bisect
+import difflib
+from google_clients import get_sheets_service, execute_with_retry, SPREADSHEETS_READONLY_SCOPE
 
+# 선택적 의존성: 설치되어 있으면 RapidFuzz로 오타/유사 종목명 매칭
+try:
+    from rapidfuzz import process, fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
 
-class StockAnalyzerGenerator:
-    """종목 상세 분석 프롬프트 생성기 (투자 노트 연동)"""
-    
-    def __init__(self, spreadsheet_id: str = None):
-        """
-        초기화
-        
-        Args:
-            spreadsheet_id (str): Google Spreadsheet ID
-        """
-        self.spreadsheet_id = spreadsheet_id
-        self.sheets_service = None
-        
-        if spreadsheet_id:
-            self._setup_google_sheets()
-    
-    def _setup_google_sheets(self):
-        """Google Sheets API 설정"""
-        try:
-            # 환경변수에서 서비스 계정 정보 가져오기
-            service_account_json_str = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON')
-            if not service_account_json_str:
-                print("⚠️ GOOGLE_APPLICATION_CREDENTIALS_JSON 환경변수가 설정되지 않았습니다.")
-                return
-            
-            service_account_info = json.loads(service_account_json_str)
-            credentials = service_account.Credentials.from_service_account_info(
-                service_account_info,
-                scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
-            )
-            self.sheets_service = build('sheets', 'v4', credentials=credentials)
-            print("✅ Google Sheets API 설정 완료")
-            
-        except Exception as e:
-            print(f"❌ Google Sheets API 설정 실패: {e}")
-            self.sheets_service = None
-    
-    def get_investment_notes(self) -> pd.DataFrame:
-        """투자 노트 시트에서 데이터를 읽어 DataFrame으로 반환"""
-        if not self.sheets_service or not self.spreadsheet_id:
-            print("⚠️ Google Sheets 서비스가 설정되지 않았습니다.")
-            return pd.DataFrame()
-        
-        try:
-            result = self.sheets_service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id, 
-                range="투자_노트"
-            ).execute()
-            values = result.get('values', [])
-            
-            if not values or len(values) < 2:
-                print("⚠️ 투자_노트 시트에 데이터가 없습니다.")
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(values[1:], columns=values[0])
-            print(f"✅ 투자_노트 DB 로드 완료: {len(df)}개 종목")
-            return df
-            
-        except Exception as e:
-            print(f"⚠️ 투자_노트 시트 읽기 실패: {e}")
-            return pd.DataFrame()
-    
-    def find_stock_note(self, stock_name: str) -> pd.Series:
-        """
-        투자 노트에서 해당 종목의 정보를 찾습니다.
-        
-        Args:
-            stock_name (str): 검색할 종목명 또는 코드
-            
-        Returns:
-            pd.Series: 해당 종목의 투자 노트 정보 (없으면 빈 Series)
-        """
-        notes_df = self.get_investment_notes()
-        
-        if notes_df.empty:
-            return pd.Series(dtype=object)
-        
-        # 종목명 또는 종목코드로 검색
-        mask = (
-            notes_df['종목명'].str.contains(stock_name, case=False, na=False) |
-            (notes_df['종목코드'] == stock_name)
-        )
-        
-        if mask.any():
-            return notes_df[mask].iloc[0]
-        
-        return pd.Series(dtype=object)
-    
-    def generate_contextual_deep_dive_prompt(self, stock_name: str, stock_note: pd.Series) -> str:
-        """
-        (투자 노트가 있을 때) 사용자의 기존 노트를 기준으로 'Bull vs. Bear' 관점의 균형 잡힌 검증 프롬프트를 생성합니다.
-        """
-        thesis = stock_note.get('투자 아이디어 (Thesis)', '내용 없음')
-        catalysts = stock_note.get('핵심 촉매 (Catalysts)', '내용 없음')
-        risks = stock_note.get('핵심 리스크 (Risks)', '내용 없음')
-        conviction = stock_note.get('투자 확신도 (Conviction)', '내용 없음')
-        sector = stock_note.get('섹터/산업 (Sector/Industry)', '내용 없음')
-        today = datetime.now().strftime('%Y년 %m월 %d일')
+# 유사 종목명 매칭 최소 점수 (0~100, 다른 종목 노트가 붙지 않도록 오타 수준만 허용)
+FUZZY_MATCH_CUTOFF = 90
+# 종목명 부분 일치 검색 시 종목명 사이에 넣는 구분자 (종목명에 나올 수 없는 제어 문자)
+NAME_SEPARATOR = '\x1f'
+# difflib 대체 경로용 최소 유사도 (0~1)
+_FUZZY_MATCH_RATIO_CUTOFF = FUZZY_MATCH_CUTOFF / 100
+
+
+@functools.lru_cache(maxsize=1)
+def _format_date(date_ordinal: int) -> str:
+    """날짜 서수를 프롬프트용 날짜 문자열로 변환 (가장 최근 날짜 하나만 캐시)"""
+    day = date.fromordinal(date_ordinal)
+    return f"{day.year}년 {day.month:02d}월 {day.day:02d}일"
+
+
+def _today_str() -> str:
+    """오늘 날짜 문자열 (날짜가 바뀔 때만 다시 포맷)"""
+    return _format_date(date.today().toordinal())
 
-        return f"""# {stock_name} 균형 분석 및 투자 노트 검증 보고서 ({today})
+
+# 맞춤형 검증 프롬프트에 사용하는 투자 노트 컬럼 (템플릿 슬롯 이름, 시트 컬럼명)
+CONTEXT_NOTE_FIELDS = (
+    ('thesis', '투자 아이디어 (Thesis)'),
+    ('catalysts', '핵심 촉매 (Catalysts)'),
+    ('risks', '핵심 리스크 (Risks)'),
+)
+NOTE_FIELD_DEFAULT = '내용 없음'
+
+# 투자_노트 시트에서 실제로 사용하는 컬럼 (검색 키 + 프롬프트 필드)
+REQUIRED_NOTE_COLUMNS = ('종목코드', '종목명') + tuple(column for _, column in CONTEXT_NOTE_FIELDS)
+# 기본 시트 구조에서 필요한 컬럼이 모두 포함되는 마지막 열 (A: 종목코드 ~ H: 핵심 리스크)
+DEFAULT_NOTES_LAST_COLUMN = 'H'
+
+
+def _column_letter(column_index: int) -> str:
+    """0부터 시작하는 열 번호를 A1 표기 열 문자로 변환 (예: 0 -> 'A', 26 -> 'AA')"""
+    letters = ''
+    column_index += 1
+    while column_index:
+        column_index, remainder = divmod(column_index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+# 맞춤형 검증 프롬프트 템플릿 (투자 노트가 있을 때)
+CONTEXTUAL_PROMPT_TEMPLATE = """# {stock_name} 균형 분석 및 투자 노트 검증 보고서 ({today})
 
 ## [중요 지시사항]
 - **역할 부여:** 당신은 나의 최종 의사결정을 돕기 위해, **객관적인 데이터에 기반한 찬성론(Bull Case)과 반대론(Bear Case)을 모두 제시하는 '균형 분석가'**입니다. 당신의 임무는 결론을 내리는 것이 아니라, 내가 최상의 결정을 내릴 수 있도록 양질의 재료(양면적 분석)를 제공하는 것입니다.
@@ -158,13 +112,8 @@ class StockAnalyzerGenerator:
    - **핵심 모니터링 지표:** [찬성/반대 논리 중 어느 쪽이 현실화되는지 판단할 수 있는 핵심 지표 3가지]
 """
 
-    def generate_generic_deep_dive_prompt(self, stock_name: str) -> str:
-        """
-        (투자 노트에 정보가 없을 때) 'Bull vs. Bear' 관점의 균형 잡힌 분석 프롬프트를 생성합니다.
-        """
-        today = datetime.now().strftime('%Y년 %m월 %d일')
-
-        return f"""# {stock_name} 균형 분석 보고서 (Bull vs. Bear) ({today})
+# 일반 분석 프롬프트 템플릿 (투자 노트가 없을 때)
+GENERIC_PROMPT_TEMPLATE = """# {stock_name} 균형 분석 보고서 (Bull vs. Bear) ({today})
 
 ## [중요 지시사항]
 - **역할 부여:** 당신은 특정 종목에 대해 **낙관론(Bull Case)과 비관론(Bear Case)을 모두 제시**하는 객관적이고 균형 잡힌 시각의 애널리스트입니다. 당신의 임무는 결론을 내리는 것이 아니라, 내가 최상의 결정을 내릴 수 있도록 양질의 재료(양면적 분석)를 제공하는 것입니다.
@@ -204,13 +153,290 @@ class StockAnalyzerGenerator:
    - **핵심 리스크 (Risks):** [가장 중요한 부정적 위험 요인 3가지]
    - **핵심 모니터링 지표 (KPIs):** [이 투자의 성패를 가늠할 가장 중요한 데이터 지표 3가지]
 """
+
+
+def _compile_template(template: str) -> tuple:
+    """
+    '{이름}' 형식의 템플릿을 미리 분해합니다.
+    
+    Returns:
+        tuple: (리터럴 조각 목록 - 슬롯 자리는 빈 문자열, (슬롯 위치, 슬롯 이름) 목록)
+    """
+    chunks = []
+    slots = []
+    for literal, field_name, _, _ in string.Formatter().parse(template):
+        if literal:
+            chunks.append(literal)
+        if field_name is not None:
+            slots.append((len(chunks), field_name))
+            chunks.append('')
+    return tuple(chunks), tuple(slots)
+
+
+def _render_template(compiled: tuple, context: dict) -> str:
+    """미리 분해한 템플릿의 슬롯 자리만 채운 뒤 한 번에 이어 붙입니다."""
+    chunks, slots = compiled
+    parts = list(chunks)  # 최종 조각 수만큼 미리 크기가 정해진 리스트
+    for position, name in slots:
+        parts[position] = str(context[name])
+    return ''.join(parts)
+
+
+_CONTEXTUAL_PROMPT_PARTS = _compile_template(CONTEXTUAL_PROMPT_TEMPLATE)
+_GENERIC_PROMPT_PARTS = _compile_template(GENERIC_PROMPT_TEMPLATE)
+
+
+@functools.lru_cache(maxsize=256)
+def _build_contextual_prompt(stock_name: str, note_values: tuple, today: str) -> str:
+    """투자 노트 기반 검증 프롬프트 (같은 종목/노트/날짜면 캐시된 결과 재사용)"""
+    context = dict(zip((slot for slot, _ in CONTEXT_NOTE_FIELDS), note_values))
+    context['stock_name'] = stock_name
+    context['today'] = today
+    return _render_template(_CONTEXTUAL_PROMPT_PARTS, context)
+
+
+@functools.lru_cache(maxsize=256)
+def _build_generic_prompt(stock_name: str, today: str) -> str:
+    """일반 분석 프롬프트 (같은 종목/날짜면 캐시된 결과 재사용)"""
+    return _render_template(_GENERIC_PROMPT_PARTS, {
+        'stock_name': stock_name,
+        'today': today,
+    })
+
+
+class StockAnalyzerGenerator:
+    """종목 상세 분석 프롬프트 생성기 (투자 노트 연동)"""
+    
+    def __init__(self, spreadsheet_id: str = None, notes_ttl: int = 300):
+        """
+        초기화
+        
+        Args:
+            spreadsheet_id (str): Google Spreadsheet ID
+            notes_ttl (int): 투자 노트 캐시 유지 시간 (초)
+        """
+        self.spreadsheet_id = spreadsheet_id
+        self._sheets_service = None
+        self._sheets_service_init = False  # Sheets API는 투자 노트를 처음 읽을 때 설정
+        self._notes_cache = None
+        self._notes_cache_ts = 0.0
+        self._notes_ttl = notes_ttl
+        self._notes_last_column = DEFAULT_NOTES_LAST_COLUMN
+        self._lookup_index = None  # (노트 목록, 코드/종목명 -> 행 위치 dict, 소문자 종목명 목록, 연결 문자열, 시작 위치)
+        # 캐시된 투자 노트 기준의 종목 검색 결과 메모이제이션 (노트 캐시가 바뀌면 비움)
+        self._find_cached_note = functools.lru_cache(maxsize=512)(self._find_in_cached_notes)
+    
+    @property
+    def sheets_service(self):
+        """Google Sheets API 서비스 (처음 사용할 때 설정)"""
+        if not self._sheets_service_init and self.spreadsheet_id:
+            self._sheets_service_init = True
+            self._setup_google_sheets()
+        return self._sheets_service
+    
+    def _setup_google_sheets(self):
+        """Google Sheets API 설정 (공용 Sheets 서비스 재사용)"""
+        try:
+            self._sheets_service = get_sheets_service((SPREADSHEETS_READONLY_SCOPE,))
+            print("✅ Google Sheets API 설정 완료")
+            
+        except Exception as e:
+            print(f"❌ Google Sheets API 설정 실패: {e}")
+            self._sheets_service = None
+    
+    def invalidate_notes_cache(self):
+        """투자 노트 캐시를 비워 다음 조회 시 시트에서 다시 읽도록 합니다."""
+        self._notes_cache = None
+        self._notes_cache_ts = 0.0
+        self._find_cached_note.cache_clear()
+    
+    def get_investment_notes(self) -> list[dict]:
+        """투자 노트 시트에서 데이터를 읽어 종목별 dict 목록으로 반환 (notes_ttl 동안 캐시)"""
+        if not self.spreadsheet_id or not self.sheets_service:
+            print("⚠️ Google Sheets 서비스가 설정되지 않았습니다.")
+            return []
+        
+        if self._notes_cache is not None and time.monotonic() - self._notes_cache_ts < self._notes_ttl:
+            return self._notes_cache
+        
+        try:
+            headers, rows = self._fetch_notes_values()
+            
+            # 필요한 컬럼이 조회 범위 밖에 있으면 범위를 넓혀 한 번 더 조회
+            last_column = self._required_last_column(headers)
+            if last_column and (len(last_column), last_column) > (len(self._notes_last_column), self._notes_last_column):
+                self._notes_last_column = last_column
+                headers, rows = self._fetch_notes_values()
+            
+            if not headers or not rows:
+                print("⚠️ 투자_노트 시트에 데이터가 없습니다.")
+                notes = []
+            else:
+                # 비어 있는 뒤쪽 셀은 키가 없으므로 .get()의 기본값이 사용됨
+                notes = [dict(zip(headers, row)) for row in rows]
+                print(f"✅ 투자_노트 DB 로드 완료: {len(notes)}개 종목")
+                # 검색 인덱스는 로드 시점에 바로 생성 (여러 스레드가 같은 인덱스를 공유)
+                self._get_lookup_index(notes)
+            
+            self._notes_cache = notes
+            self._notes_cache_ts = time.monotonic()
+            self._find_cached_note.cache_clear()
+            return notes
+            
+        except Exception as e:
+            print(f"⚠️ 투자_노트 시트 읽기 실패: {e}")
+            return []
+    
+    def _fetch_notes_values(self) -> tuple:
+        """헤더 행과 필요한 열까지의 데이터 행을 한 번의 요청으로 조회"""
+        result = execute_with_retry(self.sheets_service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id, 
+            ranges=["투자_노트!1:1", f"투자_노트!A2:{self._notes_last_column}"]
+        ))
+        header_range, data_range = result.get('valueRanges', [{}, {}])
+        headers = (header_range.get('values') or [[]])[0]
+        rows = data_range.get('values', [])
+        return headers, rows
+    
+    @staticmethod
+    def _required_last_column(headers: list) -> str:
+        """헤더에서 필요한 컬럼 중 가장 오른쪽 열 문자 (필요한 컬럼이 없으면 None)"""
+        positions = [headers.index(column) for column in REQUIRED_NOTE_COLUMNS if column in headers]
+        return _column_letter(max(positions)) if positions else None
+    
+    def _get_lookup_index(self, notes: list[dict]) -> tuple:
+        """
+        종목 검색용 인덱스를 반환합니다. 같은 노트 목록이면 이전에 만든 인덱스를 재사용합니다.
+        
+        Returns:
+            tuple: (종목코드/소문자 종목명 -> 첫 행 위치 dict, 소문자 종목명 목록,
+                    부분 일치 검색용 종목명 연결 문자열, 각 종목명의 시작 위치 목록)
+        """
+        lookup_index = self._lookup_index
+        if lookup_index is None or lookup_index[0] is not notes:
+            names_lower = []
+            exact_index = {}
+            code_positions = {}
+            # 한 번의 순회로 종목명 목록과 코드/종목명 인덱스를 함께 생성
+            for position, note in enumerate(notes):
+                code = note.get('종목코드')
+                if code:
+                    code_positions.setdefault(code, position)
+                name = str(note.get('종목명') or '').lower()
+                names_lower.append(name)
+                if name:
+                    exact_index.setdefault(name, position)
+            # 종목코드가 종목명보다 우선
+            exact_index.update(code_positions)
+            
+            # 부분 일치 검색용: 종목명을 구분자로 이어 붙인 문자열과 각 종목명의 시작 위치
+            names_blob = NAME_SEPARATOR.join(names_lower)
+            name_offsets = []
+            offset = 0
+            for name in names_lower:
+                name_offsets.append(offset)
+                offset += len(name) + len(NAME_SEPARATOR)
+            
+            lookup_index = (notes, exact_index, names_lower, names_blob, name_offsets)
+            self._lookup_index = lookup_index
+        return lookup_index[1:]
+    
+    def _search_notes(self, notes: list[dict], stock_name: str) -> dict:
+        """투자 노트 목록에서 종목을 검색해 반환 (없으면 빈 dict)"""
+        exact_index, names_lower, names_blob, name_offsets = self._get_lookup_index(notes)
+        
+        query = stock_name.lower()
+        
+        # 1) 종목코드 또는 종목명(대소문자 무시) 완전 일치
+        position = exact_index.get(stock_name)
+        if position is None:
+            position = exact_index.get(query)
+        
+        # 2) 일치하는 항목이 없으면 종목명 부분 일치로 검색
+        # (이어 붙인 문자열에서 한 번의 find로 검색 - 정규식 없음, 특수문자도 그대로 비교)
+        if position is None and NAME_SEPARATOR not in query:
+            hit = names_blob.find(query)
+            if hit >= 0:
+                position = bisect.bisect_right(name_offsets, hit) - 1
+        
+        # 3) 그래도 없으면 유사 종목명 매칭 (오타, 띄어쓰기 차이 등)
+        if position is None:
+            position = self._best_fuzzy_match(query, names_lower)
+        
+        if position is not None:
+            return notes[position]
+        
+        return {}
     
-    def generate_deep_dive_prompt(self, stock_name: str) -> tuple[str, bool]:
+    @staticmethod
+    def _best_fuzzy_match(query: str, names_lower: list[str]) -> int:
+        """
+        가장 유사한 종목명의 행 위치 반환
+        
+        FUZZY_MATCH_CUTOFF 이상인 종목명이 하나뿐일 때만 매칭하고, 없거나 여러 개면
+        None을 반환하여 일반 분석 프롬프트를 사용하게 합니다.
+        """
+        if not query:
+            return None
+        
+        if RAPIDFUZZ_AVAILABLE:
+            # 종목명은 이미 소문자로 정규화되어 있으므로 RapidFuzz의 전처리(processor)는 생략
+            matches = process.extract(
+                query, names_lower, scorer=fuzz.ratio, processor=None, score_cutoff=FUZZY_MATCH_CUTOFF, limit=2
+            )
+            return int(matches[0][2]) if len(matches) == 1 else None
+        
+        matches = difflib.get_close_matches(query, names_lower, n=2, cutoff=_FUZZY_MATCH_RATIO_CUTOFF)
+        if len(matches) == 1:
+            return names_lower.index(matches[0])
+        return None
+    
+    def _find_in_cached_notes(self, stock_name: str) -> dict:
+        """캐시된 투자 노트에서 종목 검색 (lru_cache로 감싸서 사용)"""
+        return self._search_notes(self._notes_cache, stock_name)
+    
+    def find_stock_note(self, stock_name: str, notes: list[dict] = None) -> dict:
+        """
+        투자 노트에서 해당 종목의 정보를 찾습니다.
+        
+        Args:
+            stock_name (str): 검색할 종목명 또는 코드
+            notes (list[dict]): 이미 읽어온 투자 노트 (없으면 캐시 또는 시트에서 읽음)
+            
+        Returns:
+            dict: 해당 종목의 투자 노트 정보 (없으면 빈 dict)
+        """
+        if notes is None:
+            notes = self.get_investment_notes()
+        
+        if not notes:
+            return {}
+        
+        if notes is self._notes_cache:
+            return self._find_cached_note(stock_name)
+        
+        return self._search_notes(notes, stock_name)
+    
+    def generate_contextual_deep_dive_prompt(self, stock_name: str, stock_note: dict) -> str:
+        """
+        (투자 노트가 있을 때) 사용자의 기존 노트를 기준으로 'Bull vs. Bear' 관점의 균형 잡힌 검증 프롬프트를 생성합니다.
+        """
+        note_values = tuple(stock_note.get(column, NOTE_FIELD_DEFAULT) for _, column in CONTEXT_NOTE_FIELDS)
+        return _build_contextual_prompt(stock_name, note_values, _today_str())
+
+    def generate_generic_deep_dive_prompt(self, stock_name: str) -> str:
+        """
+        (투자 노트에 정보가 없을 때) 'Bull vs. Bear' 관점의 균형 잡힌 분석 프롬프트를 생성합니다.
+        """
+        return _build_generic_prompt(stock_name, _today_str())
+    
+    def generate_deep_dive_prompt(self, stock_name: str, notes: list[dict] = None) -> tuple[str, bool]:
         """
         종목명을 받아 투자 노트 정보 유무에 따라 적절한 프롬프트를 생성합니다.
         
         Args:
             stock_name (str): 분석할 종목명 또는 코드
+            notes (list[dict]): 이미 읽어온 투자 노트 (없으면 캐시 또는 시트에서 읽음)
             
         Returns:
             tuple[str, bool]: (생성된 프롬프트, 투자 노트에서 정보를 찾았는지 여부)
@@ -218,15 +444,41 @@ class StockAnalyzerGenerator:
         sanitized_stock_name = stock_name.strip()
         
         # 투자 노트에서 해당 종목 정보 검색
-        stock_note = self.find_stock_note(sanitized_stock_name)
+        stock_note = self.find_stock_note(sanitized_stock_name, notes)
         
         # 노트 유무에 따라 다른 프롬프트 생성
-        if not stock_note.empty:
+        if stock_note:
             final_prompt = self.generate_contextual_deep_dive_prompt(sanitized_stock_name, stock_note)
             return final_prompt, True
         else:
             final_prompt = self.generate_generic_deep_dive_prompt(sanitized_stock_name)
             return final_prompt, False
+    
+    def generate_deep_dive_prompts(self, stock_names: list[str], max_workers: int = None) -> list[tuple[str, bool]]:
+        """
+        여러 종목의 프롬프트를 한 번에 생성합니다.
+        투자_노트 시트는 한 번만 읽고, 각 종목의 프롬프트는 스레드 풀에서 생성합니다.
+        
+        Args:
+            stock_names (list[str]): 분석할 종목명 또는 코드 목록
+            max_workers (int): 동시에 실행할 최대 작업 수 (기본값: 종목 수, 최대 4)
+            
+        Returns:
+            list[tuple[str, bool]]: 입력 순서와 같은 (생성된 프롬프트, DB 발견 여부) 목록
+        """
+        if not stock_names:
+            return []
+        
+        notes = self.get_investment_notes()
+        
+        if max_workers is None:
+            max_workers = min(4, len(stock_names))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda stock_name: self.generate_deep_dive_prompt(stock_name, notes),
+                stock_names
+            ))
 
 
 def main():
@@ -247,10 +499,11 @@ def main():
     # 테스트 종목들
     test_stocks = ["엔비디아", "ASML", "005930", "삼성전자"]
     
-    for stock in test_stocks:
-        print(f"\n📊 {stock} 분석 프롬프트 생성 중...")
-        prompt, found_in_db = generator.generate_deep_dive_prompt(stock)
-        
+    print(f"\n📊 {len(test_stocks)}개 종목 분석 프롬프트 일괄 생성 중...")
+    results = generator.generate_deep_dive_prompts(test_stocks)
+    
+    for stock, (prompt, found_in_db) in zip(test_stocks, results):
+        print(f"\n📊 {stock}")
         if found_in_db:
             print(f"✅ DB에서 정보 발견! 맞춤형 검증 프롬프트 생성 완료 (길이: {len(prompt)}자)")
         else:
@@ -5,11 +5,13 @@ Streamlit UI를 통해 DB 연동 종목 상세 분석 프롬프트를 생성하
 
 import streamlit as st
 import os
+from datetime import date
 from stock_analyzer_generator import StockAnalyzerGenerator
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_secret(key):
-    """Streamlit secrets 또는 환경변수에서 값 가져오기"""
+    """Streamlit secrets 또는 환경변수에서 값 가져오기 (5분 동안 캐시하여 secrets 변경도 재시작 없이 반영)"""
     try:
         if hasattr(st, 'secrets') and st.secrets:
             return st.secrets.get(key)
@@ -18,6 +20,33 @@ def get_secret(key):
     return os.getenv(key)
 
 
+@st.cache_resource
+def get_stock_analyzer(spreadsheet_id: str) -> StockAnalyzerGenerator:
+    """종목 상세 분석기 (rerun마다 새로 만들지 않고 투자 노트 캐시와 함께 재사용)"""
+    return StockAnalyzerGenerator(spreadsheet_id)
+
+
+@st.cache_data(show_spinner=False, max_entries=64, ttl=300)
+def get_deep_dive_prompt(spreadsheet_id: str, stock_name: str, today: str) -> tuple:
+    """
+    종목 분석 프롬프트 (세션에는 종목명만 저장하고 rerun 때는 캐시에서 꺼내 사용)
+    
+    today는 날짜가 바뀌면 새 프롬프트를 만들도록 캐시 키에만 사용합니다.
+    """
+    return get_stock_analyzer(spreadsheet_id).generate_deep_dive_prompt(stock_name)
+
+
+# 생성된 프롬프트와 관련된 세션 상태 키
+PROMPT_STATE_KEYS = ('analyzed_stock',)
+
+
+def clear_prompt_state():
+    """생성된 프롬프트 관련 세션 상태 초기화"""
+    for key in PROMPT_STATE_KEYS:
+        st.session_state.pop(key, None)
+
+
+@st.fragment
 def render_stock_analyzer_page():
     """종목 상세 분석기 페이지 렌더링"""
     
@@ -39,7 +68,7 @@ def render_stock_analyzer_page():
     
     # 분석기 초기화
     try:
-        generator = StockAnalyzerGenerator(spreadsheet_id)
+        generator = get_stock_analyzer(spreadsheet_id)
     except Exception as e:
         st.error(f"❌ 종목 상세 분석기 초기화 실패: {e}")
         return
@@ -75,12 +104,10 @@ def render_stock_analyzer_page():
                 try:
                     # 프롬프트 생성
                     with st.spinner("프롬프트를 생성하고 있습니다..."):
-                        final_prompt, found_in_db = generator.generate_deep_dive_prompt(user_stock_name)
+                        final_prompt, found_in_db = get_deep_dive_prompt(spreadsheet_id, user_stock_name.strip(), date.today().isoformat())
                     
-                    # 세션 상태에 저장
-                    st.session_state['generated_prompt'] = final_prompt
+                    # 세션 상태에는 종목명만 저장 (프롬프트는 캐시에서 다시 꺼냄)
                     st.session_state['analyzed_stock'] = user_stock_name.strip()
-                    st.session_state['found_in_db'] = found_in_db
                     
                     if found_in_db:
                         st.success(f"✅ '{user_stock_name.strip()}' 정보를 투자 노트에서 찾았습니다! 맞춤형 검증 프롬프트가 생성되었습니다.")
@@ -92,21 +119,26 @@ def render_stock_analyzer_page():
     
     with col2:
         if st.button("🔄 새로고침", key="refresh_btn", use_container_width=True):
+            # 투자 노트를 다시 읽도록 캐시 비우기
+            generator.invalidate_notes_cache()
+            get_deep_dive_prompt.clear()
             # 세션 상태 초기화
-            if 'generated_prompt' in st.session_state:
-                del st.session_state['generated_prompt']
-            if 'analyzed_stock' in st.session_state:
-                del st.session_state['analyzed_stock']
-            if 'found_in_db' in st.session_state:
-                del st.session_state['found_in_db']
+            clear_prompt_state()
             st.rerun()
     
     # 생성된 프롬프트 표시
-    if 'generated_prompt' in st.session_state and st.session_state['generated_prompt']:
-        st.markdown(f"### 3️⃣ {st.session_state['analyzed_stock']} 분석 프롬프트")
+    if st.session_state.get('analyzed_stock'):
+        analyzed_stock = st.session_state['analyzed_stock']
+        try:
+            generated_prompt, found_in_db = get_deep_dive_prompt(spreadsheet_id, analyzed_stock, date.today().isoformat())
+        except Exception as e:
+            st.error(f"❌ 프롬프트 생성 실패: {e}")
+            return
+        
+        st.markdown(f"### 3️⃣ {analyzed_stock} 분석 프롬프트")
         
         # 프롬프트 타입 표시
-        if st.session_state.get('found_in_db', False):
+        if found_in_db:
             st.markdown("""
             <div style="background-color: #d4edda; padding: 1rem; border-radius: 8px; border-left: 4px solid #28a745; margin-bottom: 1rem;">
                 <h4 style="color: #155724; margin: 0;">🎯 맞춤형 검증 프롬프트</h4>
@@ -125,7 +157,7 @@ def render_stock_analyzer_page():
         
         # 프롬프트 표시
         st.code(
-            st.session_state['generated_prompt'],
+            generated_prompt,
             language="text",
             line_numbers=False
         )
@@ -153,22 +185,12 @@ def render_stock_analyzer_page():
         
         with col2:
             if st.button("🗑️ 프롬프트 삭제", key="delete_btn", use_container_width=True):
-                if 'generated_prompt' in st.session_state:
-                    del st.session_state['generated_prompt']
-                if 'analyzed_stock' in st.session_state:
-                    del st.session_state['analyzed_stock']
-                if 'found_in_db' in st.session_state:
-                    del st.session_state['found_in_db']
+                clear_prompt_state()
                 st.rerun()
         
         with col3:
             if st.button("📈 다른 종목 분석", key="new_analysis_btn", use_container_width=True):
-                if 'generated_prompt' in st.session_state:
-                    del st.session_state['generated_prompt']
-                if 'analyzed_stock' in st.session_state:
-                    del st.session_state['analyzed_stock']
-                if 'found_in_db' in st.session_state:
-                    del st.session_state['found_in_db']
+                clear_prompt_state()
                 st.rerun()
     
     # 사용법 안내
@@ -2,63 +2,15 @@ import streamlit as st
 import os
 import sys
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
+import plotly.express as px
 from datetime import datetime
 from portfolio_manager import KoreaInvestmentAPI, GoogleSheetsManager, Account, ExchangeRateAPI
 
 
-# 투자 노트 생성기 import
-try:
-    from investment_note_generator import InvestmentNoteGenerator
-    INVESTMENT_NOTE_GENERATOR_AVAILABLE = True
-except ImportError:
-    INVESTMENT_NOTE_GENERATOR_AVAILABLE = False
-
-# 보고서 아카이브 관리자 import
-try:
-    from report_archive_manager import ReportArchiveManager
-    REPORT_ARCHIVE_AVAILABLE = True
-except ImportError:
-    REPORT_ARCHIVE_AVAILABLE = False
-
-# 투자 탐색기 import
-try:
-    from investment_exploration_generator import render_exploration_page
-    EXPLORATION_GENERATOR_AVAILABLE = True
-except ImportError:
-    EXPLORATION_GENERATOR_AVAILABLE = False
-
-# UI 모듈 import
-try:
-    from report_archive_ui import render_report_archive_page
-    REPORT_ARCHIVE_UI_AVAILABLE = True
-except ImportError:
-    REPORT_ARCHIVE_UI_AVAILABLE = False
-
-try:
-    from daily_briefing_ui import render_daily_briefing_page
-    DAILY_BRIEFING_UI_AVAILABLE = True
-except ImportError:
-    DAILY_BRIEFING_UI_AVAILABLE = False
-
-try:
-    from investment_notes_ui import render_investment_notes_page
-    INVESTMENT_NOTES_UI_AVAILABLE = True
-except ImportError:
-    INVESTMENT_NOTES_UI_AVAILABLE = False
-
-try:
-    from stock_analyzer_ui import render_stock_analyzer_page
-    STOCK_ANALYZER_UI_AVAILABLE = True
-except ImportError:
-    STOCK_ANALYZER_UI_AVAILABLE = False
-
-try:
-    from portfolio_diagnosis_ui import render_portfolio_diagnosis_page
-    PORTFOLIO_DIAGNOSIS_UI_AVAILABLE = True
-except ImportError:
-    PORTFOLIO_DIAGNOSIS_UI_AVAILABLE = False
-
 # 페이지 설정
 st.set_page_config(
     page_title="AI 포트폴리오 관리 시스템",
@@ -66,130 +18,175 @@ st.set_page_config(
     layout="wide"
 )
 
+# 계좌 연결에 필요한 환경변수
+REQUIRED_ENV_VARS = (
+    'KOREA_INVESTMENT_ACC_NO_DOMESTIC', 'KOREA_INVESTMENT_API_KEY_DOMESTIC', 'KOREA_INVESTMENT_API_SECRET_DOMESTIC',
+    'KOREA_INVESTMENT_ACC_NO_PENSION', 'KOREA_INVESTMENT_API_KEY_PENSION', 'KOREA_INVESTMENT_API_SECRET_PENSION',
+    'KOREA_INVESTMENT_ACC_NO_OVERSEAS', 'KOREA_INVESTMENT_API_KEY_OVERSEAS', 'KOREA_INVESTMENT_API_SECRET_OVERSEAS',
+    'GOOGLE_SPREADSHEET_ID'
+)
+
+# 사이드바에 상태를 표시할 환경변수
+ENV_STATUS_VARS = (
+    'KOREA_INVESTMENT_ACC_NO_DOMESTIC', 'KOREA_INVESTMENT_API_KEY_DOMESTIC', 
+    'KOREA_INVESTMENT_ACC_NO_PENSION', 'KOREA_INVESTMENT_API_KEY_PENSION',
+    'KOREA_INVESTMENT_ACC_NO_OVERSEAS', 'KOREA_INVESTMENT_API_KEY_OVERSEAS',
+    'GOOGLE_SPREADSHEET_ID', 'GOOGLE_API_KEY'
+)
+
+# 포트폴리오 상세 테이블에 표시할 열 (비중 열은 표시할 때 계산하여 추가)
+SUMMARY_TABLE_COLUMNS = ('종목명', '보유수량', '현재가', '평가금액', '평가손익', '수익률', '계좌구분')
+
+# 이 시간(초) 안에 다시 업데이트하면 API 조회 없이 직전 결과를 표시
+PORTFOLIO_RESULT_TTL = 60
+
+# 진행 표시 갱신 최소 간격 (초)
+PROGRESS_UPDATE_INTERVAL = 0.2
+
 # 세션 상태 초기화
-if 'api' not in st.session_state:
-    st.session_state.api = None
-if 'sheets_manager' not in st.session_state:
-    st.session_state.sheets_manager = None
-if 'accounts' not in st.session_state:
-    st.session_state.accounts = None
+st.session_state.setdefault('api', None)
+st.session_state.setdefault('sheets_manager', None)
+
+@st.cache_resource
+def get_kis_api():
+    """한국투자증권 API (발급받은 접근 토큰을 세션과 rerun 사이에서 공유)"""
+    return KoreaInvestmentAPI()
+
+@st.cache_resource
+def get_sheets_manager():
+    """구글 스프레드시트 관리자 (인증된 서비스를 세션과 rerun 사이에서 공유)"""
+    return GoogleSheetsManager()
 
 def initialize_components():
     """API 컴포넌트 초기화"""
     if st.session_state.api is None:
-        st.session_state.api = KoreaInvestmentAPI()
+        st.session_state.api = get_kis_api()
     if st.session_state.sheets_manager is None:
-        st.session_state.sheets_manager = GoogleSheetsManager()
+        st.session_state.sheets_manager = get_sheets_manager()
 
-def load_accounts():
-    """계좌 정보 로드"""
-    # Streamlit Cloud에서는 st.secrets를 사용, 로컬에서는 os.getenv 사용
-    def get_secret(key):
-        # Streamlit Cloud에서 secrets 접근 시도
-        try:
-            if hasattr(st, 'secrets') and st.secrets:
-                value = st.secrets.get(key)
-                if value:
-                    # Google Service Account JSON은 너무 길어서 표시하지 않음
-                    if key == 'GOOGLE_APPLICATION_CREDENTIALS_JSON':
-                        st.sidebar.success(f"✅ {key}: Google Service Account JSON 설정됨")
-                    else:
-                        st.sidebar.success(f"✅ {key}: {str(value)[:10]}...")
-                    return value
-        except Exception as e:
-            st.sidebar.error(f"❌ {key}: secrets 접근 오류 - {str(e)}")
-        
-        # 로컬에서 환경변수 접근
-        value = os.getenv(key)
+# 설정된 secrets 값 캐시 (키 -> 값, 비어 있는 값은 저장하지 않음)
+_secret_cache = {}
+
+# Streamlit Cloud에서는 st.secrets를 사용, 로컬에서는 os.getenv 사용
+def _read_secret(key):
+    """Streamlit secrets 또는 환경변수에서 값 가져오기"""
+    try:
+        if hasattr(st, 'secrets') and st.secrets:
+            value = st.secrets.get(key)
+            if value:
+                return value
+    except Exception:
+        pass
+    return os.getenv(key)
+
+def get_secret(key):
+    """
+    secrets 값 가져오기 (설정된 값은 키별로 프로세스당 1회만 조회)
+    
+    비어 있는 값은 캐시하지 않으므로, 나중에 추가된 secrets도 다음 rerun에서 반영됩니다.
+    """
+    value = _secret_cache.get(key)
+    if not value:
+        value = _read_secret(key)
         if value:
-            if key == 'GOOGLE_APPLICATION_CREDENTIALS_JSON':
-                st.sidebar.info(f"🔧 {key}: Google Service Account JSON 설정됨")
-            else:
-                st.sidebar.info(f"🔧 {key}: {str(value)[:10]}...")
-        else:
-            st.sidebar.warning(f"❌ {key}: 설정되지 않음")
-        return value
-    
-    required_env_vars = [
-        'KOREA_INVESTMENT_ACC_NO_DOMESTIC', 'KOREA_INVESTMENT_API_KEY_DOMESTIC', 'KOREA_INVESTMENT_API_SECRET_DOMESTIC',
-        'KOREA_INVESTMENT_ACC_NO_PENSION', 'KOREA_INVESTMENT_API_KEY_PENSION', 'KOREA_INVESTMENT_API_SECRET_PENSION',
-        'KOREA_INVESTMENT_ACC_NO_OVERSEAS', 'KOREA_INVESTMENT_API_KEY_OVERSEAS', 'KOREA_INVESTMENT_API_SECRET_OVERSEAS',
-        'GOOGLE_SPREADSHEET_ID'
-    ]
-    
-    missing_vars = []
-    for var in required_env_vars:
-        if not get_secret(var):
-            missing_vars.append(var)
-    
-    if missing_vars:
-        st.warning(f"⚠️ 다음 환경변수가 설정되지 않았습니다: {', '.join(missing_vars)}")
-        st.info("📝 Streamlit Cloud 대시보드에서 환경변수를 설정해주세요.")
-        st.info("🔧 또는 로컬에서 .env 파일에 다음 변수들을 추가해주세요:")
-        for var in missing_vars:
-            st.code(f"{var}=your_value")
+            _secret_cache[key] = value
+    return value
+
+def get_secrets(keys):
+    """여러 키의 값을 한 번에 조회하여 dict로 반환"""
+    return {key: get_secret(key) for key in keys}
+
+def get_missing_env_vars():
+    """설정되지 않은 필수 환경변수 목록 반환"""
+    return [var for var, value in get_secrets(REQUIRED_ENV_VARS).items() if not value]
+
+def show_missing_env_vars(missing_vars):
+    """누락된 환경변수 안내 표시"""
+    st.warning(f"⚠️ 다음 환경변수가 설정되지 않았습니다: {', '.join(missing_vars)}")
+    st.info("📝 Streamlit Cloud 대시보드에서 환경변수를 설정해주세요.")
+    st.info("🔧 또는 로컬에서 .env 파일에 다음 변수들을 추가해주세요:")
+    for var in missing_vars:
+        st.code(f"{var}=your_value")
+
+def load_accounts():
+    """계좌 정보 로드 (필수 환경변수가 없으면 None - None은 캐시하지 않으므로 설정 후 바로 반영)"""
+    secrets = get_secrets(REQUIRED_ENV_VARS)
+    if not all(secrets.values()):
         return None
+    return build_accounts(tuple(secrets[var] for var in REQUIRED_ENV_VARS))
+
+@st.cache_resource
+def build_accounts(secret_values: tuple) -> list:
+    """필수 환경변수 값(REQUIRED_ENV_VARS 순서)으로 계좌 목록 생성 (값 조합별로 1회만 생성하여 rerun 간 재사용)"""
+    secrets = dict(zip(REQUIRED_ENV_VARS, secret_values))
     
     accounts = [
         Account(
             name="국내주식",
-            acc_no=get_secret('KOREA_INVESTMENT_ACC_NO_DOMESTIC'),
-            api_key=get_secret('KOREA_INVESTMENT_API_KEY_DOMESTIC'),
-            api_secret=get_secret('KOREA_INVESTMENT_API_SECRET_DOMESTIC'),
+            acc_no=secrets['KOREA_INVESTMENT_ACC_NO_DOMESTIC'],
+            api_key=secrets['KOREA_INVESTMENT_API_KEY_DOMESTIC'],
+            api_secret=secrets['KOREA_INVESTMENT_API_SECRET_DOMESTIC'],
             account_type="domestic_stock"
         ),
         Account(
             name="국내연금",
-            acc_no=get_secret('KOREA_INVESTMENT_ACC_NO_PENSION'),
-            api_key=get_secret('KOREA_INVESTMENT_API_KEY_PENSION'),
-            api_secret=get_secret('KOREA_INVESTMENT_API_SECRET_PENSION'),
+            acc_no=secrets['KOREA_INVESTMENT_ACC_NO_PENSION'],
+            api_key=secrets['KOREA_INVESTMENT_API_KEY_PENSION'],
+            api_secret=secrets['KOREA_INVESTMENT_API_SECRET_PENSION'],
             account_type="pension"
         ),
         Account(
             name="해외주식",
-            acc_no=get_secret('KOREA_INVESTMENT_ACC_NO_OVERSEAS'),
-            api_key=get_secret('KOREA_INVESTMENT_API_KEY_OVERSEAS'),
-            api_secret=get_secret('KOREA_INVESTMENT_API_SECRET_OVERSEAS'),
+            acc_no=secrets['KOREA_INVESTMENT_ACC_NO_OVERSEAS'],
+            api_key=secrets['KOREA_INVESTMENT_API_KEY_OVERSEAS'],
+            api_secret=secrets['KOREA_INVESTMENT_API_SECRET_OVERSEAS'],
             account_type="overseas"
         )
     ]
     
     return accounts
 
+def get_account_display_rows():
+    """사이드바 표시용 (계좌명, 계좌번호 앞 8자리) 목록 (필수 환경변수가 없으면 빈 목록)"""
+    accounts = load_accounts() or []
+    return [(account.name, account.acc_no[:8]) for account in accounts]
+
+def format_note_list(title, notes_df):
+    """투자 노트 목록을 '종목명 (종목코드)' 목록 마크다운 하나로 변환"""
+    items = "- " + notes_df['종목명'].astype(str) + " (" + notes_df['종목코드'].astype(str) + ")"
+    return f"**{title}:**\n\n" + "\n".join(items)
+
+@st.cache_resource
+def get_notes_manager(spreadsheet_id):
+    """투자 노트 매니저 (스프레드시트별로 인증된 인스턴스를 재사용)"""
+    from investment_notes_manager import InvestmentNotesManager
+    return InvestmentNotesManager(spreadsheet_id)
+
 def sync_investment_notes():
     """투자 노트와 포트폴리오 상태 동기화"""
     try:
-        if not INVESTMENT_NOTE_GENERATOR_AVAILABLE:
-            st.error("❌ 투자 노트 동기화 기능을 사용할 수 없습니다.")
-            st.info("💡 필요한 모듈이 설치되지 않았습니다.")
-            return
-        
         # 환경변수 확인
-        def get_secret(key):
-            try:
-                return st.secrets[key]
-            except:
-                return os.getenv(key)
-        
         spreadsheet_id = get_secret('GOOGLE_SPREADSHEET_ID')
         
         if not spreadsheet_id:
             st.error("❌ GOOGLE_SPREADSHEET_ID가 설정되지 않았습니다.")
             return
         
+        # 투자 노트 매니저 초기화 (동기화에 필요한 모듈은 버튼을 눌렀을 때만 import)
+        try:
+            notes_manager = get_notes_manager(spreadsheet_id)
+        except ImportError:
+            st.error("❌ 투자 노트 동기화 기능을 사용할 수 없습니다.")
+            st.info("💡 필요한 모듈이 설치되지 않았습니다.")
+            return
+        
         with st.spinner("투자 노트와 포트폴리오 상태를 동기화하고 있습니다..."):
-            # 투자 노트 매니저 초기화
-            from investment_notes_manager import InvestmentNotesManager
-            notes_manager = InvestmentNotesManager(spreadsheet_id)
-            
-            # 기존 데이터 마이그레이션 확인
-            notes_manager.migrate_existing_notes()
-            
-            # 포트폴리오 데이터 읽기
+            # 투자 노트와 포트폴리오 데이터를 한 번의 요청으로 읽기
             st.info("📋 포트폴리오 데이터를 읽고 있습니다...")
-            from daily_briefing_generator import DailyBriefingGenerator
-            generator = DailyBriefingGenerator(spreadsheet_id)
-            portfolio_df = generator.get_sheet_data("Portfolio")
+            notes_df, portfolio_df = notes_manager.read_notes_and_portfolio("Portfolio")
+            
+            # 기존 데이터 마이그레이션 확인 (읽어 둔 투자 노트에 바로 반영)
+            notes_manager.migrate_existing_notes(notes_df)
             
             if portfolio_df.empty:
                 st.warning("⚠️ 포트폴리오 데이터가 없습니다. 먼저 포트폴리오를 업데이트해주세요.")
@@ -197,38 +194,33 @@ def sync_investment_notes():
             
             # 투자 노트 상태 업데이트
             st.info("🔄 투자 노트 상태를 업데이트하고 있습니다...")
-            success = notes_manager.update_portfolio_status(portfolio_df)
+            success = notes_manager.update_portfolio_status(portfolio_df, notes_df)
             
             if success:
                 st.success("✅ 투자 노트 동기화가 완료되었습니다!")
                 
-                # 동기화 결과 표시
-                portfolio_notes = notes_manager.get_portfolio_notes()
-                watchlist_notes = notes_manager.get_watchlist_notes()
-                sold_notes = notes_manager.get_sold_notes()
+                # 동기화 결과 표시 (갱신된 투자 노트를 다시 읽지 않고 상태별로 분류)
+                notes_by_status = notes_manager.split_notes_by_status(notes_df)
+                portfolio_notes = notes_by_status['보유중']
+                watchlist_notes = notes_by_status['관심종목']
+                sold_notes = notes_by_status['매도완료']
                 
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
                     st.metric("보유 종목", len(portfolio_notes))
                     if not portfolio_notes.empty:
-                        st.write("**보유 종목들:**")
-                        for _, note in portfolio_notes.iterrows():
-                            st.write(f"• {note['종목명']} ({note['종목코드']})")
+                        st.markdown(format_note_list("보유 종목들", portfolio_notes))
                 
                 with col2:
                     st.metric("관심 종목", len(watchlist_notes))
                     if not watchlist_notes.empty:
-                        st.write("**관심 종목들:**")
-                        for _, note in watchlist_notes.iterrows():
-                            st.write(f"• {note['종목명']} ({note['종목코드']})")
+                        st.markdown(format_note_list("관심 종목들", watchlist_notes))
                 
                 with col3:
                     st.metric("매도 완료", len(sold_notes))
                     if not sold_notes.empty:
-                        st.write("**매도 완료 종목들:**")
-                        for _, note in sold_notes.iterrows():
-                            st.write(f"• {note['종목명']} ({note['종목코드']})")
+                        st.markdown(format_note_list("매도 완료 종목들", sold_notes))
             else:
                 st.error("❌ 투자 노트 동기화에 실패했습니다.")
                 
@@ -237,13 +229,41 @@ def sync_investment_notes():
         import traceback
         st.error(f"상세 오류: {traceback.format_exc()}")
 
-def update_portfolio():
-    """포트폴리오 업데이트 실행"""
+def fetch_account(api, account):
+    """
+    계좌 하나의 포트폴리오와 현금 잔고 조회 (작업 스레드에서 실행)
+    
+    해외 현금 잔고는 포트폴리오 조회 때 갱신된 환율로 환산하므로 같은 스레드에서 순서대로 조회합니다.
+    API 객체는 세션 간에 공유되므로, 이때 사용한 환율 정보도 조회 직후 함께 반환합니다.
+    
+    Returns:
+        tuple: (포트폴리오 목록, 현금 잔고, (환율, 환율 출처) 또는 None)
+    """
+    if account.account_type == "overseas":
+        portfolio = api.get_overseas_portfolio(account)
+        cash = api.get_overseas_cash(account)
+        rate_info = (api.exchange_rate, api.exchange_rate_source) if api.exchange_rate else None
+        return portfolio, cash, rate_info
+    
+    portfolio = api.get_domestic_portfolio(account)
+    cash = api.get_domestic_cash(account)
+    return portfolio, cash, None
+
+def update_portfolio(force_refresh=False):
+    """포트폴리오 업데이트 실행 (최근 업데이트 직후에는 force_refresh 없이 다시 조회하지 않음)"""
     try:
+        # 방금 업데이트했다면 API 조회와 시트 쓰기 없이 저장된 결과 표시
+        last_result = st.session_state.get('last_portfolio_result')
+        if last_result and not force_refresh and time.time() - last_result['timestamp'] < PORTFOLIO_RESULT_TTL:
+            st.info(f"💡 {PORTFOLIO_RESULT_TTL}초 이내에 업데이트한 결과를 표시합니다. 최신 데이터가 필요하면 '강제 새로고침'을 선택하세요.")
+            display_portfolio_summary(last_result['portfolio_df'], last_result['total_cash'], last_result['exchange_rate'])
+            return
+        
         initialize_components()
         accounts = load_accounts()
         
         if accounts is None:
+            show_missing_env_vars(get_missing_env_vars())
             return
         
         # 진행 상황 표시
@@ -258,47 +278,58 @@ def update_portfolio():
         
         status_text.text("🔍 포트폴리오 조회 중...")
         
-        for i, account in enumerate(accounts):
-            progress = (i / len(accounts))  # 0.0 ~ 1.0 사이의 값으로 변경
-            progress_bar.progress(progress)
-            status_text.text(f"🔍 {account.name} 계좌 조회 중...")
-            
-            # 주식 포트폴리오 조회
-            if account.account_type == "overseas":
-                portfolio = st.session_state.api.get_overseas_portfolio(account)
-                # 환율 정보 저장
-                if st.session_state.api.exchange_rate:
-                    exchange_rate = st.session_state.api.exchange_rate
-                    exchange_source = st.session_state.api.exchange_rate_source
-            else:
-                portfolio = st.session_state.api.get_domestic_portfolio(account)
-            
+        # 계좌별 조회를 동시에 실행 (Streamlit 호출은 메인 스레드에서만 수행)
+        api = st.session_state.api
+        results = [None] * len(accounts)
+        with ThreadPoolExecutor(max_workers=len(accounts)) as executor:
+            futures = {executor.submit(fetch_account, api, account): i for i, account in enumerate(accounts)}
+            last_tick = 0.0
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                results[i] = future.result()
+                # 진행 표시는 최대 0.2초마다 한 번만 갱신 (마지막 완료는 항상 표시)
+                now = time.monotonic()
+                if now - last_tick > PROGRESS_UPDATE_INTERVAL or done == len(accounts):
+                    progress_bar.progress(done / len(accounts))
+                    status_text.text(f"🔍 {accounts[i].name} 계좌 조회 완료 ({done}/{len(accounts)})")
+                    last_tick = now
+        
+        # 계좌 순서대로 결과 합산
+        for portfolio, cash, rate_info in results:
             if portfolio:
                 all_portfolio.extend(portfolio)
-            
-            # 현금 잔고 조회 및 누적
-            if account.account_type == "overseas":
-                cash = st.session_state.api.get_overseas_cash(account)
-            else:
-                cash = st.session_state.api.get_domestic_cash(account)
-            
             total_cash += cash
+            # 환율 정보 저장 (해외 계좌 조회 시점의 값)
+            if rate_info:
+                exchange_rate, exchange_source = rate_info
+        
+        # 열 단위 데이터프레임으로 한 번만 변환하여 시트 업데이트와 요약 표시에 함께 사용
+        portfolio_df = pd.DataFrame(all_portfolio)
         
         progress_bar.progress(1.0)  # 완료 시 1.0으로 설정
         status_text.text("📊 구글 스프레드시트 업데이트 중...")
         
-        if all_portfolio or total_cash > 0:
-            # 구글 스프레드시트에 업데이트
+        if not portfolio_df.empty or total_cash > 0:
+            # 구글 스프레드시트에 업데이트 (batchClear 1회 + batchUpdate 1회로 전체 범위를 한 번에 기록)
             st.session_state.sheets_manager.update_portfolio(
-                all_portfolio, total_cash, exchange_rate, exchange_source
+                portfolio_df, total_cash, exchange_rate, exchange_source
             )
             
+            # 짧은 시간 안의 반복 실행에 재사용할 결과 저장
+            st.session_state.last_portfolio_result = {
+                'timestamp': time.time(),
+                'portfolio_df': portfolio_df,
+                'total_cash': total_cash,
+                'exchange_rate': exchange_rate
+            }
+            st.session_state.last_update = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
             # 결과 표시
             st.success("✅ 포트폴리오 업데이트가 완료되었습니다!")
             st.info("💡 투자 노트 상태를 동기화하려면 '📝 투자 노트 동기화' 버튼을 클릭하세요.")
             
             # 포트폴리오 요약 표시
-            display_portfolio_summary(all_portfolio, total_cash, exchange_rate)
+            display_portfolio_summary(portfolio_df, total_cash, exchange_rate)
             
         else:
             st.warning("❌ 조회된 포트폴리오가 없습니다.")
@@ -306,15 +337,28 @@ def update_portfolio():
     except Exception as e:
         st.error(f"❌ 포트폴리오 처리 실패: {e}")
 
-def display_portfolio_summary(portfolio, total_cash, exchange_rate):
-    """포트폴리오 요약 정보 표시"""
-    if not portfolio:
+@st.cache_data(show_spinner=False)
+def build_account_pie_chart(labels, values):
+    """계좌별 비중 파이 차트 (같은 계좌별 합계면 캐시된 차트 재사용)"""
+    return px.pie(
+        values=list(values), 
+        names=list(labels), 
+        title="계좌별 비중",
+        hole=0.3
+    )
+
+def display_portfolio_summary(portfolio_df, total_cash, exchange_rate):
+    """포트폴리오 요약 정보 표시 (portfolio_df: 종목별 포트폴리오 데이터프레임)"""
+    if portfolio_df.empty:
         return
     
     st.subheader("📊 포트폴리오 요약")
     
+    df = portfolio_df
+    
     # 전체 포트폴리오 가치 계산
-    total_value = sum(item['평가금액'] for item in portfolio) + total_cash
+    stock_value = df['평가금액'].sum()
+    total_value = stock_value + total_cash
     
     # 메트릭 표시
     col1, col2, col3, col4 = st.columns(4)
@@ -326,7 +370,6 @@ def display_portfolio_summary(portfolio, total_cash, exchange_rate):
         st.metric("현금", f"{total_cash:,.0f}원")
     
     with col3:
-        stock_value = sum(item['평가금액'] for item in portfolio)
         st.metric("주식 평가금액", f"{stock_value:,.0f}원")
     
     with col4:
@@ -336,43 +379,83 @@ def display_portfolio_summary(portfolio, total_cash, exchange_rate):
     # 계좌별 비중
     st.subheader("🏦 계좌별 비중")
     
-    account_data = {}
-    for item in portfolio:
-        account = item['계좌구분']
-        if account not in account_data:
-            account_data[account] = 0
-        account_data[account] += item['평가금액']
+    # 차트 데이터 준비 (계좌 등장 순서 유지)
+    grouped = df.groupby('계좌구분', sort=False)['평가금액'].sum()
+    labels = grouped.index.tolist()
+    values = grouped.values
     
-    # 차트 데이터 준비
-    labels = list(account_data.keys())
-    values = list(account_data.values())
-    
-    if values:
-        import plotly.express as px
-        
-        fig = px.pie(
-            values=values, 
-            names=labels, 
-            title="계좌별 비중",
-            hole=0.3
-        )
+    if len(values):
+        fig = build_account_pie_chart(tuple(labels), tuple(values.tolist()))
         st.plotly_chart(fig, use_container_width=True)
     
     # 포트폴리오 상세 테이블
     st.subheader("📋 포트폴리오 상세")
     
-    if portfolio:
-        import pandas as pd
-        df = pd.DataFrame(portfolio)
-        
-        # 비중 계산
-        df['비중'] = (df['평가금액'] / total_value * 100).round(2)
-        
-        # 테이블 표시
-        st.dataframe(
-            df[['종목명', '보유수량', '현재가', '평가금액', '평가손익', '수익률', '계좌구분', '비중']],
-            use_container_width=True
-        )
+    # 표시할 열만 한 번 골라낸 뒤 비중 열 추가 (원본 데이터프레임은 수정하지 않음)
+    table_df = df.loc[:, list(SUMMARY_TABLE_COLUMNS)].assign(
+        비중=np.round(df['평가금액'].to_numpy() * (100.0 / total_value), 2)
+    )
+    
+    # 테이블 표시
+    st.dataframe(table_df, use_container_width=True)
+
+@st.fragment
+def render_sidebar_status():
+    """
+    사이드바의 환경변수/계좌 상태와 Secrets 디버깅 영역 렌더링
+    
+    fragment로 분리하여 디버깅 토글을 바꿀 때는 이 영역만 다시 실행합니다.
+    사이드바 컨테이너 안에서 호출해야 합니다.
+    """
+    # 환경변수 상태 표시
+    st.markdown("### 🔧 환경변수 상태")
+    
+    env_status = {var: "✅" if value else "❌" for var, value in get_secrets(ENV_STATUS_VARS).items()}
+    
+    # 환경변수 상태를 카드 형태로 표시 (카드를 모아 한 번에 렌더링)
+    env_cards = []
+    for var, status in env_status.items():
+        color = "#d4edda" if status == "✅" else "#f8d7da"
+        text_color = "#155724" if status == "✅" else "#721c24"
+        env_cards.append(f"""
+        <div style="background-color: {color}; padding: 0.5rem; border-radius: 5px; margin: 0.25rem 0; border-left: 4px solid {'#28a745' if status == '✅' else '#dc3545'};">
+            <span style="color: {text_color}; font-weight: bold;">{status}</span> 
+            <span style="color: {text_color}; font-size: 0.9rem;">{var}</span>
+        </div>
+        """)
+    st.markdown("".join(env_cards), unsafe_allow_html=True)
+    
+    # 계좌 정보 표시
+    account_rows = get_account_display_rows()
+    if account_rows:
+        st.markdown("### 🏦 연결된 계좌")
+        account_cards = [f"""
+            <div style="background-color: #e3f2fd; padding: 0.75rem; border-radius: 8px; margin: 0.5rem 0; border-left: 4px solid #2196f3;">
+                <div style="font-weight: bold; color: #1976d2;">{name}</div>
+                <div style="font-size: 0.85rem; color: #424242;">{acc_no_prefix}***</div>
+            </div>
+            """ for name, acc_no_prefix in account_rows]
+        st.markdown("".join(account_cards), unsafe_allow_html=True)
+    else:
+        st.subheader("🏦 연결된 계좌")
+        st.warning("⚠️ 환경변수가 설정되지 않았습니다")
+    
+    # 디버깅: secrets 확인 (개발용, 기본 꺼짐)
+    if st.toggle("🔍 Secrets 디버깅 (개발용)", value=False, key='secrets_debug'):
+        st.subheader("🔍 Secrets 디버깅")
+        try:
+            if hasattr(st, 'secrets'):
+                debug_lines = ["✅ st.secrets 사용 가능"]
+                if st.secrets:
+                    debug_lines.append(f"📝 Secrets 개수: {len(st.secrets)}")
+                    debug_lines.extend(f"🔑 {key}: {str(st.secrets[key])[:20]}..." for key in st.secrets.keys())
+                else:
+                    debug_lines.append("❌ st.secrets가 비어있음")
+                st.text("\n".join(debug_lines))
+            else:
+                st.write("❌ st.secrets 사용 불가")
+        except Exception as e:
+            st.write(f"❌ Secrets 오류: {str(e)}")
 
 def main():
     """메인 Streamlit 앱"""
@@ -404,75 +487,16 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # 환경변수 상태 표시
-    st.sidebar.markdown("### 🔧 환경변수 상태")
-    
-    def get_secret(key):
-        try:
-            return st.secrets[key]
-        except:
-            return os.getenv(key)
-    
-    env_status = {}
-    env_vars = [
-        'KOREA_INVESTMENT_ACC_NO_DOMESTIC', 'KOREA_INVESTMENT_API_KEY_DOMESTIC', 
-        'KOREA_INVESTMENT_ACC_NO_PENSION', 'KOREA_INVESTMENT_API_KEY_PENSION',
-        'KOREA_INVESTMENT_ACC_NO_OVERSEAS', 'KOREA_INVESTMENT_API_KEY_OVERSEAS',
-        'GOOGLE_SPREADSHEET_ID', 'GOOGLE_API_KEY'
-    ]
-    
-    for var in env_vars:
-        env_status[var] = "✅" if get_secret(var) else "❌"
-    
-    # 환경변수 상태를 카드 형태로 표시
-    for var, status in env_status.items():
-        color = "#d4edda" if status == "✅" else "#f8d7da"
-        text_color = "#155724" if status == "✅" else "#721c24"
-        st.sidebar.markdown(f"""
-        <div style="background-color: {color}; padding: 0.5rem; border-radius: 5px; margin: 0.25rem 0; border-left: 4px solid {'#28a745' if status == '✅' else '#dc3545'};">
-            <span style="color: {text_color}; font-weight: bold;">{status}</span> 
-            <span style="color: {text_color}; font-size: 0.9rem;">{var}</span>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # 계좌 정보 표시
-    accounts = load_accounts()
-    if accounts:
-        st.sidebar.markdown("### 🏦 연결된 계좌")
-        for account in accounts:
-            st.sidebar.markdown(f"""
-            <div style="background-color: #e3f2fd; padding: 0.75rem; border-radius: 8px; margin: 0.5rem 0; border-left: 4px solid #2196f3;">
-                <div style="font-weight: bold; color: #1976d2;">{account.name}</div>
-                <div style="font-size: 0.85rem; color: #424242;">{account.acc_no[:8]}***</div>
-            </div>
-            """, unsafe_allow_html=True)
-    else:
-        st.sidebar.subheader("🏦 연결된 계좌")
-        st.sidebar.warning("⚠️ 환경변수가 설정되지 않았습니다")
-    
-    # 디버깅: secrets 확인 (개발용)
-    if st.sidebar.checkbox("🔍 Secrets 디버깅 (개발용)", value=False):
-        st.sidebar.subheader("🔍 Secrets 디버깅")
-        try:
-            if hasattr(st, 'secrets'):
-                st.sidebar.write("✅ st.secrets 사용 가능")
-                if st.secrets:
-                    st.sidebar.write(f"📝 Secrets 개수: {len(st.secrets)}")
-                    for key in st.secrets.keys():
-                        st.sidebar.write(f"🔑 {key}: {str(st.secrets[key])[:20]}...")
-                else:
-                    st.sidebar.write("❌ st.secrets가 비어있음")
-            else:
-                st.sidebar.write("❌ st.secrets 사용 불가")
-        except Exception as e:
-            st.sidebar.write(f"❌ Secrets 오류: {str(e)}")
+    # 환경변수/계좌 상태 표시
+    with st.sidebar:
+        render_sidebar_status()
     
     # 최근 업데이트 정보
     if 'last_update' in st.session_state:
         st.sidebar.subheader("📅 최근 업데이트")
         st.sidebar.text(st.session_state.last_update)
     
-    # 페이지별 컨텐츠
+    # 페이지별 컨텐츠 (각 페이지 모듈은 선택되었을 때만 import)
     if page == "🔄 포트폴리오 업데이트":
         # 페이지 헤더
         st.markdown("""
@@ -482,15 +506,18 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
-        if accounts:
+        # 계좌 객체는 실제로 조회가 필요한 이 페이지에서만 로드
+        if load_accounts():
             # 주요 기능 버튼들
             st.markdown("### 🚀 주요 기능")
             
             col1, col2 = st.columns(2)
             
             with col1:
+                force_refresh = st.checkbox("강제 새로고침", value=False, key="force_refresh",
+                                            help=f"{PORTFOLIO_RESULT_TTL}초 이내에 다시 업데이트해도 API를 새로 조회합니다")
                 if st.button("🔄 포트폴리오 업데이트", type="primary", use_container_width=True):
-                    update_portfolio()
+                    update_portfolio(force_refresh)
             
             with col2:
                 if st.button("📝 투자 노트 동기화", type="secondary", use_container_width=True):
@@ -534,7 +561,9 @@ def main():
     
     elif page == "📝 투자 노트 자동 생성":
         # 투자 노트 자동 생성 기능
-        if not INVESTMENT_NOTES_UI_AVAILABLE:
+        try:
+            from investment_notes_ui import render_investment_notes_page
+        except ImportError:
             st.error("❌ 투자 노트 자동 생성 기능을 사용할 수 없습니다.")
             st.info("💡 필요한 모듈이 설치되지 않았습니다.")
             return
@@ -544,7 +573,9 @@ def main():
     
     elif page == "🎯 데일리 브리핑 생성기":
         # 데일리 브리핑 생성기 기능
-        if not DAILY_BRIEFING_UI_AVAILABLE:
+        try:
+            from daily_briefing_ui import render_daily_briefing_page
+        except ImportError:
             st.error("❌ 데일리 브리핑 생성기 기능을 사용할 수 없습니다.")
             st.info("💡 필요한 모듈이 설치되지 않았습니다.")
             return
@@ -554,7 +585,9 @@ def main():
     
     elif page == "📚 보고서 아카이브":
         # 보고서 아카이브 기능
-        if not REPORT_ARCHIVE_UI_AVAILABLE:
+        try:
+            from report_archive_ui import render_report_archive_page
+        except ImportError:
             st.error("❌ 보고서 아카이브 기능을 사용할 수 없습니다.")
             st.info("💡 필요한 모듈이 설치되지 않았습니다.")
             return
@@ -564,7 +597,9 @@ def main():
     
     elif page == "🧭 유망 종목 탐색기":
         # 유망 종목 탐색기 기능
-        if not EXPLORATION_GENERATOR_AVAILABLE:
+        try:
+            from investment_exploration_generator import render_exploration_page
+        except ImportError:
             st.error("❌ 유망 종목 탐색기 기능을 사용할 수 없습니다.")
             st.info("💡 필요한 모듈이 설치되지 않았습니다.")
             return
@@ -574,7 +609,9 @@ def main():
     
     elif page == "🔬 종목 상세 분석기":
         # 종목 상세 분석기 기능
-        if not STOCK_ANALYZER_UI_AVAILABLE:
+        try:
+            from stock_analyzer_ui import render_stock_analyzer_page
+        except ImportError:
             st.error("❌ 종목 상세 분석기 기능을 사용할 수 없습니다.")
             st.info("💡 필요한 모듈이 설치되지 않았습니다.")
             return
@@ -584,7 +621,9 @@ def main():
     
     elif page == "⚖️ 포트폴리오 정밀 진단":
         # 포트폴리오 정밀 진단기 기능
-        if not PORTFOLIO_DIAGNOSIS_UI_AVAILABLE:
+        try:
+            from portfolio_diagnosis_ui import render_portfolio_diagnosis_page
+        except ImportError:
             st.error("❌ 포트폴리오 정밀 진단기 기능을 사용할 수 없습니다.")
             st.info("💡 필요한 모듈이 설치되지 않았습니다.")
             return
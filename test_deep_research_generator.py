@@ -10,7 +10,7 @@ from deep_research_question_generator import DeepResearchQuestionGenerator
 
 # 투자 노트 매니저 import
 try:
-    from investment_notes_manager import InvestmentNotesManager
+    from investment_notes_manager import InvestmentNotesManager, NotesSheetNotFoundError
     INVESTMENT_NOTES_AVAILABLE = True
 except ImportError:
     INVESTMENT_NOTES_AVAILABLE = False
@@ -51,7 +51,7 @@ def main():
             try:
                 notes_df = notes_manager.read_investment_notes()
                 print(f"📊 현재 투자 노트: {len(notes_df)}개 종목")
-            except:
+            except NotesSheetNotFoundError:
                 print("📝 '투자_노트' 시트가 없습니다. 새로 생성합니다.")
                 notes_manager.create_investment_notes_sheet()
                 notes_df = notes_manager.read_investment_notes()
@@ -66,8 +66,9 @@ def main():
         
         # 투자 노트가 있는 종목들 확인
         if notes_manager:
-            portfolio_notes = notes_manager.get_notes_by_portfolio(portfolio_df)
-            missing_notes = notes_manager.get_missing_notes(portfolio_df)
+            # 위에서 읽은 투자 노트를 재사용 (시트를 다시 읽지 않음)
+            portfolio_notes = notes_manager.get_notes_by_portfolio(portfolio_df, notes_df)
+            missing_notes = notes_manager.get_missing_notes(portfolio_df, notes_df)
             
             print(f"\n📝 포트폴리오 투자 노트 현황:")
             print(f"- 투자 노트 있는 종목: {len(portfolio_notes)}개")
@@ -130,8 +131,10 @@ def main():
         
     except Exception as e:
         print(f"❌ 테스트 중 오류 발생: {e}")
-        import traceback
-        print(f"상세 오류: {traceback.format_exc()}")
+        # 전체 traceback은 APP_DEBUG가 설정된 경우에만 출력
+        if os.getenv('APP_DEBUG'):
+            import traceback
+            print(f"상세 오류: {traceback.format_exc()}")
 
 if __name__ == "__main__":
     main()